@@ -0,0 +1,170 @@
+import re
+from collections import deque
+
+import pandas as pd
+
+from fuzzy_match import concept_names
+
+_WORD = re.compile(r"\w+(?:[-']\w+)*")
+
+
+def word_form(word: str) -> str:
+    """
+    Lower-cased, roughly singular form of a word, applied to both the concept
+    names and the abstracts ("States" -> "state", "qubits" -> "qubit",
+    "properties" -> "property"). Cheap stand-in for a lemmatizer.
+    """
+    w = word.lower()
+    if len(w) > 4 and w.endswith("ies"):
+        return w[:-3] + "y"
+    if len(w) > 3 and w.endswith("s") and not w.endswith(("ss", "us", "is")):
+        return w[:-1]
+    return w
+
+
+def tokenize(text: str):
+    """
+    [(word form, start, end)] of a text, offsets in characters.
+    """
+    return [(word_form(m.group()), m.start(), m.end()) for m in _WORD.finditer(text)]
+
+
+class ConceptTagger:
+    """
+    Aho-Corasick automaton over word forms: every concept name (and its variants)
+    is one path of words; tagging runs through the words of a text once,
+    whatever the number of concepts, and reports every name it contains
+    (overlapping ones included).
+    """
+
+    def __init__(self):
+        self.goto = [{}]      # state -> {word: state}
+        self.fail = [0]
+        self.out = [[]]       # state -> [(concept, number of words)]
+        self.compiled = False
+
+    def add(self, name: str, concept=None):
+        words = [w for w, _, _ in tokenize(name)]
+        if not words:
+            return
+        state = 0
+        for w in words:
+            nxt = self.goto[state].get(w)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][w] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        entry = (concept if concept is not None else name, len(words))
+        if entry not in self.out[state]:
+            self.out[state].append(entry)
+        self.compiled = False
+
+    def compile(self):
+        """
+        Failure links by breadth-first search; the outputs of the failure state
+        are merged so that shorter names inside longer ones are reported too.
+        """
+        queue = deque(self.goto[0].values())
+        for s in queue:
+            self.fail[s] = 0
+        while queue:
+            state = queue.popleft()
+            for w, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and w not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(w, 0)
+                self.out[nxt] = self.out[nxt] + [o for o in self.out[self.fail[nxt]] if o not in self.out[nxt]]
+        self.compiled = True
+        return self
+
+    def tag(self, text: str):
+        """
+        [(concept, start, end)] of the concept names found in `text`.
+        """
+        if not self.compiled:
+            self.compile()
+        if not isinstance(text, str):
+            return []
+        tokens = tokenize(text)
+        hits, state = [], 0
+        for i, (w, _, end) in enumerate(tokens):
+            while state and w not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(w, 0)
+            for concept, n in self.out[state]:
+                hits.append((concept, tokens[i - n + 1][1], end))
+        return hits
+
+    @property
+    def size(self) -> int:
+        return len(self.goto)
+
+
+def build_tagger(names, nlp=None) -> ConceptTagger:
+    """
+    Tagger over concept display names. With a spaCy `nlp`, the lemmatized form
+    of each name is added as a variant of the same concept.
+    """
+    tagger = ConceptTagger()
+    names = list(names)
+    for name in names:
+        tagger.add(name, name)
+    if nlp is not None:
+        for name, doc in zip(names, nlp.pipe(names, batch_size=256)):
+            tagger.add(" ".join(t.lemma_ for t in doc), name)
+    return tagger.compile()
+
+
+def tag_corpus(tagger: ConceptTagger, csv_file="quantum_computing_subtree_papers.csv",
+               text_columns=("title", "abstract"), chunksize: int = 10000, own_concepts: bool = False):
+    """
+    Yields, per chunk of the papers CSV, the hits (paper_id, concept, field,
+    start, end, text). With `own_concepts` only the concepts listed for the
+    paper in `concept_names` are kept.
+    """
+    columns = ["paper_id", *text_columns] + (["concept_names"] if own_concepts else [])
+    for chunk in pd.read_csv(csv_file, usecols=columns, chunksize=chunksize):
+        rows = []
+        for record in chunk.itertuples(index=False):
+            record = record._asdict()
+            allowed = None
+            if own_concepts:
+                listed = record["concept_names"]
+                allowed = {c.strip() for c in listed.split(";")} if isinstance(listed, str) else set()
+            for field in text_columns:
+                text = record[field]
+                for concept, start, end in tagger.tag(text):
+                    if allowed is None or concept in allowed:
+                        rows.append((record["paper_id"], concept, field, start, end, text[start:end]))
+        yield pd.DataFrame(rows, columns=["paper_id", "concept", "field", "start", "end", "text"])
+
+
+def link_triples(triples: pd.DataFrame, tagger: ConceptTagger) -> pd.DataFrame:
+    """
+    Adds the concepts named in the subject and in the object of each triple
+    (subject_concepts, object_concepts), each distinct argument tagged once.
+    """
+    df = triples.copy()
+    for column in ("subject", "object"):
+        found = {term: sorted({c for c, _, _ in tagger.tag(term)}) for term in df[column].dropna().unique()}
+        df[f"{column}_concepts"] = df[column].map(found)
+    return df
+
+
+def write_hits(csv_file="quantum_computing_subtree_papers.csv", out_file="concept_hits.csv", **kwargs):
+    tagger = build_tagger(concept_names(csv_file))
+    total = 0
+    for k, hits in enumerate(tag_corpus(tagger, csv_file, **kwargs)):
+        hits.to_csv(out_file, mode="w" if k == 0 else "a", header=(k == 0), index=False)
+        total += len(hits)
+        print(f"✔ chunk {k}: {total:,} hits")
+    return total
+
+
+if __name__ == "__main__":
+    write_hits("quantum_computing_subtree_papers.csv", "concept_hits.csv")
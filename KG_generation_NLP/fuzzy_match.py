@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from ontology_index import normalize
+
+
+class VectorIndex:
+    """
+    Nearest-neighbour index over a list of names (ontology labels, concept names).
+    By default names are character n-gram TF-IDF vectors (robust to inflection,
+    word order and spelling: "entangled states" ~ "quantum entanglement" /
+    "entanglement"). N-grams start at 3 characters: shorter ones are shared by
+    almost every pair of strings and only add noise and work.
+    `encoder` (list of str -> dense L2-normalized array), e.g. sentence_encoder(),
+    replaces TF-IDF by embeddings.
+    """
+
+    def __init__(self, names, ids=None, encoder=None, ngram_range=(3, 4), min_df: int = 1):
+        names = pd.Series(list(names), dtype=object)
+        keep = names.map(lambda n: bool(normalize(n)) if isinstance(n, str) else False).to_numpy()
+        self.names = names[keep].to_numpy(dtype=object)
+        self.ids = (np.asarray(list(ids), dtype=object)[keep] if ids is not None else self.names)
+        self.encoder = encoder
+        keys = [normalize(n) for n in self.names]
+        if encoder is None:
+            self.vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=ngram_range,
+                                              min_df=min_df, sublinear_tf=True, dtype=np.float32)
+            self.vectors = self.vectorizer.fit_transform(keys).T.tocsr()  # n-grams × names
+        else:
+            self.vectors = np.asarray(encoder(keys), dtype=np.float32).T
+
+    def _encode(self, keys):
+        if self.encoder is None:
+            return self.vectorizer.transform(keys)
+        return np.asarray(self.encoder(keys), dtype=np.float32)
+
+    def query(self, terms, k: int = 5, min_score: float = 0.0, batch_size: int = None) -> pd.DataFrame:
+        """
+        Top-k names for each term, with cosine similarity scores.
+        Distinct terms are searched once, by batches whose terms × names score
+        block is dense (by default ~16M scores, 64 MB); the top k of each row are
+        selected inside the block.
+        Returns (term, rank, match, id, score), best match first.
+        """
+        terms = pd.Series(list(terms), dtype=object).dropna().unique()
+        batch_size = batch_size or max(1, 2 ** 24 // max(1, len(self.names)))
+        frames = []
+        for start in range(0, len(terms), batch_size):
+            batch = terms[start:start + batch_size]
+            scores = self._encode([normalize(t) for t in batch]) @ self.vectors
+            if sparse.issparse(scores):
+                scores = scores.toarray()
+            rows, cols, vals = _top_k(scores, k, min_score)
+            frames.append(pd.DataFrame({
+                "term": batch[rows],
+                "rank": _ranks(rows),
+                "match": self.names[cols],
+                "id": self.ids[cols],
+                "score": vals,
+            }))
+        if not frames:
+            return pd.DataFrame(columns=["term", "rank", "match", "id", "score"])
+        return pd.concat(frames, ignore_index=True)
+
+    def best(self, terms, min_score: float = 0.0) -> pd.DataFrame:
+        """
+        Best match of each term, indexed by term.
+        """
+        return self.query(terms, k=1, min_score=min_score).set_index("term")
+
+
+def _top_k(scores: np.ndarray, k: int, min_score: float):
+    """
+    (row, column, score) of the k best scores (> min_score) of each row of a
+    dense block, sorted by row then by decreasing score.
+    """
+    n = min(k, scores.shape[1])
+    if n == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0, dtype=scores.dtype)
+    cols = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+    vals = np.take_along_axis(scores, cols, axis=1)
+    order = np.argsort(-vals, axis=1, kind="stable")
+    cols, vals = np.take_along_axis(cols, order, axis=1).ravel(), np.take_along_axis(vals, order, axis=1).ravel()
+    rows = np.repeat(np.arange(len(scores)), n)
+    keep = vals > min_score
+    return rows[keep], cols[keep], vals[keep]
+
+
+def _ranks(rows) -> np.ndarray:
+    """
+    Position of each element inside its run of equal (sorted) rows: 0, 1, 2, ...
+    """
+    if len(rows) == 0:
+        return np.zeros(0, dtype=int)
+    starts = np.r_[0, np.flatnonzero(np.diff(rows)) + 1]
+    run_start = np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+    return np.arange(len(rows)) - run_start
+
+
+def sentence_encoder(model_name: str = "all-MiniLM-L6-v2", batch_size: int = 256):
+    """
+    Encoder for VectorIndex from a local sentence-transformers model (CPU).
+    sentence-transformers is optional and only imported here.
+    """
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(texts):
+        return model.encode(list(texts), batch_size=batch_size, normalize_embeddings=True)
+    return encode
+
+
+# -------------------------------------------------------------------
+# Ontology and OpenAlex concept indexes
+# -------------------------------------------------------------------
+def ontology_vectors(index, **kwargs) -> VectorIndex:
+    """
+    VectorIndex over the names and labels of an OntologyIndex, id = URI.
+    """
+    keys = list(index.terms)
+    return VectorIndex(keys, [index.terms[key][0] for key in keys], **kwargs)
+
+
+def concept_names(csv_file="quantum_computing_subtree_papers.csv") -> np.ndarray:
+    """
+    Distinct OpenAlex concept names of a papers CSV, from a `concept_names`
+    column ("name; name") or a `concepts` column ("id|name|score;...").
+    """
+    columns = pd.read_csv(csv_file, nrows=0).columns
+    column = "concept_names" if "concept_names" in columns else "concepts"
+    names = set()
+    for chunk in pd.read_csv(csv_file, usecols=[column], chunksize=50000):
+        parts = chunk[column].dropna().str.split(";").explode().str.strip()
+        if column == "concepts":
+            parts = parts.str.split("|").str[1]
+        names.update(parts.dropna())
+    names.discard("")
+    return np.array(sorted(names), dtype=object)
+
+
+def align_triples(triples: pd.DataFrame, indexes: dict, min_score: float = 0.3) -> pd.DataFrame:
+    """
+    Adds, for the subject and object of each triple and each VectorIndex of
+    `indexes` (e.g. {"onto": ..., "concept": ...}), the best match, its id and
+    its score ({column}_{name}, {column}_{name}_id, {column}_{name}_score).
+    """
+    df = triples.copy()
+    for column in ("subject", "object"):
+        for name, index in indexes.items():
+            best = index.best(df[column], min_score)
+            df[f"{column}_{name}"] = df[column].map(best["match"])
+            df[f"{column}_{name}_id"] = df[column].map(best["id"])
+            df[f"{column}_{name}_score"] = df[column].map(best["score"])
+    return df
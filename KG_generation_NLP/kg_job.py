@@ -0,0 +1,174 @@
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+
+import pandas as pd
+
+from nlp_pipeline import COLUMNS, doc_record, load_nlp
+from ontology_index import normalize
+from ontology_snapshot import load_index
+
+PAPER = "http://example.org/paper#"
+KG = "http://example.org/kg#"
+FIELDS = ["paper_id", "publication_year", "subject", "predicate", "object",
+          "subject_uri", "predicate_uri", "object_uri"]
+SINKS = ("csv", "parquet", "nt")
+
+# Loaded once per worker process (see _init_worker)
+_NLP = None
+_INDEX = None
+
+
+def _init_worker(model, ontology):
+    global _NLP, _INDEX
+    _NLP = load_nlp(model, entities=False)
+    _INDEX = load_index(ontology)
+
+
+def extract_batch(papers: pd.DataFrame) -> pd.DataFrame:
+    """
+    Worker task: parses the abstracts of `papers` once (nlp.pipe), extracts the
+    SVO triples and maps them onto the ontology. One row per triple (FIELDS).
+    """
+    rows = []
+    for doc, (paper_id, year) in _NLP.pipe(
+            zip(papers["abstract"], zip(papers["paper_id"], papers["publication_year"])),
+            as_tuples=True, batch_size=64):
+        for subj, pred, obj in doc_record(doc)["triples"]:
+            rows.append((paper_id, year, subj, pred, obj))
+    triples = pd.DataFrame(rows, columns=FIELDS[:5])
+    if triples.empty:
+        return pd.DataFrame(columns=FIELDS)
+    mapped = _INDEX.map_triples(triples)
+    return mapped[FIELDS]
+
+
+# -------------------------------------------------------------------
+# Sinks: one partition file per chunk
+# -------------------------------------------------------------------
+def term_iri(term, uri=None) -> str:
+    """
+    Ontology URI of a term if it was mapped, else a KG IRI built from the term.
+    """
+    if isinstance(uri, str) and uri:
+        return uri
+    return KG + quote(normalize(term).replace(" ", "_"), safe="")
+
+
+def to_ntriples(triples: pd.DataFrame) -> str:
+    """
+    Extracted triples as N-Triples, with the papers that mention their subject
+    and object (<paper> kg:mentions <term>).
+    """
+    lines = set()
+    for r in triples.itertuples(index=False):
+        s, o = term_iri(r.subject, r.subject_uri), term_iri(r.object, r.object_uri)
+        p = term_iri(r.predicate, r.predicate_uri)
+        paper = PAPER + str(r.paper_id)
+        lines.add(f"<{s}> <{p}> <{o}> .")
+        lines.add(f"<{paper}> <{KG}mentions> <{s}> .")
+        lines.add(f"<{paper}> <{KG}mentions> <{o}> .")
+    return "\n".join(sorted(lines)) + ("\n" if lines else "")
+
+
+def write_partition(triples: pd.DataFrame, out_dir, part: int, sink: str = "csv", ids=()) -> str:
+    """
+    Writes part-{part:05d}.{csv|parquet|nt} through a temporary file, so that a
+    partition on disk is always complete. The paper IDs of the chunk (`ids`) go
+    to part-{part:05d}.ids first: they only count as done once the partition
+    itself is renamed into place.
+    """
+    path = os.path.join(out_dir, f"part-{part:05d}.{sink}")
+    tmp = path + ".tmp"
+    ids_path = os.path.join(out_dir, f"part-{part:05d}.ids")
+    with open(ids_path + ".tmp", "w", encoding="utf-8") as f:
+        f.writelines(f"{i}\n" for i in ids)
+    os.replace(ids_path + ".tmp", ids_path)
+    if sink == "csv":
+        triples.to_csv(tmp, index=False)
+    elif sink == "parquet":
+        triples.to_parquet(tmp, index=False)  # needs pyarrow or fastparquet
+    elif sink == "nt":
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(to_ntriples(triples))
+    else:
+        raise ValueError(f"Unknown sink '{sink}' ({', '.join(SINKS)})")
+    os.replace(tmp, path)
+    return path
+
+
+# -------------------------------------------------------------------
+# Resume state
+# -------------------------------------------------------------------
+def partitions(out_dir) -> dict:
+    """
+    {part number: path} of the complete partitions of `out_dir`.
+    """
+    found = {}
+    for name in os.listdir(out_dir):
+        m = re.match(rf"part-(\d{{5}})\.({'|'.join(SINKS)})$", name)
+        if m:
+            found[int(m.group(1))] = os.path.join(out_dir, name)
+    return found
+
+
+def done_ids(out_dir) -> set:
+    """
+    Paper IDs of the complete partitions (an .ids file without its partition
+    is a chunk interrupted before its commit, so its papers are not done).
+    """
+    done = set()
+    for part in partitions(out_dir):
+        path = os.path.join(out_dir, f"part-{part:05d}.ids")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                done.update(line.strip() for line in f if line.strip())
+    return done
+
+
+def next_part(out_dir) -> int:
+    parts = partitions(out_dir)
+    return max(parts) + 1 if parts else 0
+
+
+def run_job(csv_file="quantum_computing_subtree_papers.csv", out_dir="kg_triples", sink: str = "csv",
+            chunksize: int = 2000, workers: int = None, batch_size: int = 200,
+            model: str = "en_core_web_sm", ontology="PhySci/PhySci.ttl"):
+    """
+    Streams the papers CSV by chunks of `chunksize` papers. Each chunk is split
+    into batches of `batch_size` abstracts processed by a pool of `workers`
+    processes (extract_batch); its triples are written as one partition, with
+    its paper IDs next to it (part-N.ids). Re-running the job skips the papers
+    of the complete partitions, so an interrupted run resumes where it stopped
+    and no chunk is written twice.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    done = done_ids(out_dir)
+    part = next_part(out_dir)
+    load_index(ontology)  # builds the ontology snapshot once, before the workers read it
+    start, total = time.time(), 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model, ontology)) as pool:
+        for chunk in pd.read_csv(csv_file, usecols=COLUMNS, chunksize=chunksize):
+            chunk = chunk.dropna(subset=["abstract"])
+            chunk = chunk[~chunk["paper_id"].astype(str).isin(done)]
+            if chunk.empty:
+                continue
+            batches = [chunk.iloc[i:i + batch_size] for i in range(0, len(chunk), batch_size)]
+            results = list(pool.map(extract_batch, batches))
+            triples = pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=FIELDS)
+
+            write_partition(triples, out_dir, part, sink, ids=chunk["paper_id"].astype(str))
+            part += 1
+            total += len(chunk)
+            elapsed = time.time() - start
+            print(f"✔ part {part - 1}: {total:,} abstracts, {len(triples):,} triples, "
+                  f"{total / elapsed:.1f} abstracts/s")
+    return total
+
+
+if __name__ == "__main__":
+    run_job("quantum_computing_subtree_papers.csv", "kg_triples", sink="csv")
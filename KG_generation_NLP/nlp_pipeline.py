@@ -0,0 +1,153 @@
+import os
+import pandas as pd
+import spacy
+from spacy.tokens import DocBin
+
+MODEL = "en_core_web_sm"
+COLUMNS = ["paper_id", "title", "abstract", "publication_year", "authors", "concept_names"]
+
+# Components of en_core_web_sm needed by each output
+NEEDS = {
+    "lemmas": {"tok2vec", "tagger", "attribute_ruler", "lemmatizer"},
+    "entities": {"ner"},
+    "triples": {"tok2vec", "tagger", "attribute_ruler", "lemmatizer", "parser"},
+}
+
+
+def load_nlp(model: str = MODEL, lemmas: bool = True, entities: bool = True, triples: bool = True):
+    """
+    Loads the spaCy model with only the components needed for the requested
+    outputs enabled (e.g. no parser when triples are not extracted).
+    """
+    keep = set()
+    for name, wanted in (("lemmas", lemmas), ("entities", entities), ("triples", triples)):
+        if wanted:
+            keep |= NEEDS[name]
+    nlp = spacy.load(model)
+    nlp.select_pipes(enable=[name for name in nlp.pipe_names if name in keep])
+    return nlp
+
+
+# -------------------------------------------------------------------
+# Extraction from one parsed abstract
+# -------------------------------------------------------------------
+def clean_text(doc) -> str:
+    """
+    Lemmas without stop words and punctuation (the notebook's clean_abstract).
+    """
+    return " ".join(token.lemma_ for token in doc if not token.is_stop and not token.is_punct)
+
+
+def extract_entities(doc) -> list:
+    return [(ent.text, ent.label_) for ent in doc.ents]
+
+
+def extract_triples(doc) -> list:
+    """
+    Subject-verb-object triples, same rule as the notebook: a subject opens a
+    triple with its head verb, the next object of the sentence closes it.
+    Words are lemmatized, as the notebook ran on the lemmatized abstract.
+    """
+    triples = []
+    for sent in doc.sents:
+        subject, verb = "", ""
+        for token in sent:
+            if "subj" in token.dep_:
+                subject, verb = token.lemma_, token.head.lemma_
+            if "obj" in token.dep_ and subject:
+                triples.append((subject, verb, token.lemma_))
+                subject, verb = "", ""
+    return triples
+
+
+def doc_record(doc) -> dict:
+    """
+    Everything the notebook extracted from an abstract, read from one Doc.
+    """
+    return {
+        "abstract": clean_text(doc),
+        "entities": extract_entities(doc),
+        "triples": extract_triples(doc) if doc.has_annotation("DEP") else [],
+    }
+
+
+# -------------------------------------------------------------------
+# Parsing with DocBin cache
+# -------------------------------------------------------------------
+def parse(nlp, texts, ids, batch_size: int = 64, n_process: int = 1):
+    """
+    Runs nlp.pipe once over the abstracts; the paper ID travels with each Doc
+    (doc.user_data["paper_id"]).
+    """
+    docs = []
+    for doc, paper_id in nlp.pipe(zip(texts, ids), as_tuples=True,
+                                  batch_size=batch_size, n_process=n_process):
+        doc.user_data["paper_id"] = paper_id
+        docs.append(doc)
+    return docs
+
+
+def load_shard(nlp, path, ids):
+    """
+    Docs of a DocBin shard, or None if the shard is missing or was built for
+    other papers.
+    """
+    if not os.path.exists(path):
+        return None
+    docs = list(DocBin(store_user_data=True).from_disk(path).get_docs(nlp.vocab))
+    if [doc.user_data.get("paper_id") for doc in docs] != list(ids):
+        return None
+    return docs
+
+
+def save_shard(docs, path):
+    DocBin(docs=docs, store_user_data=True).to_disk(path)
+
+
+def iter_processed(csv_file="quantum_computing_subtree_papers.csv", nlp=None, cache_dir="parsed_docs",
+                   chunksize: int = 2000, batch_size: int = 64, n_process: int = 1):
+    """
+    Streams the papers CSV chunk by chunk and yields one DataFrame per chunk with
+    the notebook's processed_df columns (abstract = cleaned abstract, entities,
+    triples). Each abstract is parsed once; the Docs of chunk k are cached in
+    {cache_dir}/docs_{k:05d}.spacy and reused on the next run.
+    """
+    nlp = nlp or load_nlp()
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    for k, chunk in enumerate(pd.read_csv(csv_file, usecols=COLUMNS, chunksize=chunksize)):
+        # "N/A" abstracts are read as NaN
+        chunk = chunk.dropna(subset=["abstract"]).reset_index(drop=True)
+        if chunk.empty:
+            continue
+        ids = chunk["paper_id"].tolist()
+        shard = os.path.join(cache_dir, f"docs_{k:05d}.spacy") if cache_dir else None
+
+        docs = load_shard(nlp, shard, ids) if shard else None
+        if docs is None:
+            docs = parse(nlp, chunk["abstract"].tolist(), ids, batch_size, n_process)
+            if shard:
+                save_shard(docs, shard)
+
+        records = pd.DataFrame([doc_record(doc) for doc in docs])
+        chunk["abstract"] = records["abstract"]
+        chunk["entities"] = records["entities"]
+        chunk["triples"] = records["triples"]
+        yield chunk
+
+
+def process_corpus(csv_file="quantum_computing_subtree_papers.csv", out_file="processed_abstracts.csv", **kwargs):
+    """
+    Writes iter_processed chunk by chunk into `out_file`.
+    """
+    total = 0
+    for k, chunk in enumerate(iter_processed(csv_file, **kwargs)):
+        chunk.to_csv(out_file, mode="w" if k == 0 else "a", header=(k == 0), index=False)
+        total += len(chunk)
+        print(f"✔ {total:,} abstracts")
+    return total
+
+
+if __name__ == "__main__":
+    process_corpus("quantum_computing_subtree_papers.csv", "processed_abstracts.csv")
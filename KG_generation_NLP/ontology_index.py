@@ -0,0 +1,175 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import rdflib
+from rdflib.namespace import OWL, RDF, RDFS, SKOS
+
+PHY = "https://w3id.org/SKGO/phy#"
+LABELS = (RDFS.label, SKOS.prefLabel, SKOS.altLabel)
+FORMATS = {".ttl": "turtle", ".rdf": "xml", ".owl": "xml", ".nt": "nt"}
+
+
+def normalize(term) -> str:
+    """
+    Lookup key of a term: camelCase, underscores and hyphens split into words,
+    lower case ("Quantum_Entanglement", "quantumEntanglement" -> "quantum entanglement").
+    """
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", str(term))
+    return re.sub(r"[\s_\-]+", " ", text).strip().lower()
+
+
+def local_name(uri: str) -> str:
+    return re.split(r"[#/]", str(uri))[-1]
+
+
+def load_ontology(path) -> rdflib.Graph:
+    """
+    Parses PhySci.ttl / physci.rdf / physci.owl (format from the extension).
+    """
+    suffix = "." + str(path).rsplit(".", 1)[-1].lower()
+    g = rdflib.Graph()
+    g.parse(path, format=FORMATS.get(suffix, "turtle"))
+    return g
+
+
+class OntologyIndex:
+    """
+    Lookup tables built once from the ontology graph:
+        terms:     normalized local name / label -> URIs (exact local name first)
+        types:     URI -> rdf:type URIs
+        ancestors: class URI -> all its superclasses (rdfs:subClassOf closure)
+    Mapping a term is then a dictionary lookup instead of a SPARQL query.
+    """
+
+    def __init__(self, terms: dict, types: dict, ancestors: dict):
+        self.terms = terms
+        self.types = types
+        self.ancestors = ancestors
+
+    @classmethod
+    def from_graph(cls, g: rdflib.Graph):
+        types = defaultdict(list)
+        for s, o in g.subject_objects(RDF.type):
+            if isinstance(s, rdflib.URIRef) and isinstance(o, rdflib.URIRef):
+                types[str(s)].append(str(o))
+
+        parents = defaultdict(set)
+        for s, o in g.subject_objects(RDFS.subClassOf):
+            if isinstance(s, rdflib.URIRef) and isinstance(o, rdflib.URIRef):
+                parents[str(s)].add(str(o))
+        ancestors = {c: frozenset(_closure(c, parents)) for c in parents}
+
+        # local names first, so that an exact name wins over a label of another entity
+        terms = defaultdict(list)
+        for uri in types:
+            terms[normalize(local_name(uri))].append(uri)
+        for p in LABELS:
+            for s, o in g.subject_objects(p):
+                key = normalize(o)
+                if isinstance(s, rdflib.URIRef) and key and str(s) not in terms[key]:
+                    terms[key].append(str(s))
+        return cls(dict(terms), dict(types), ancestors)
+
+    @classmethod
+    def from_file(cls, path):
+        return cls.from_graph(load_ontology(path))
+
+    # The three tables as flat parallel string arrays (for np.savez, see ontology_snapshot.py)
+    def to_arrays(self) -> dict:
+        def flat(table):
+            pairs = [(k, v) for k, values in table.items() for v in values]
+            keys, values = zip(*pairs) if pairs else ((), ())
+            return np.array(keys, dtype=str), np.array(values, dtype=str)
+
+        arrays = {}
+        for name, table in (("terms", self.terms), ("types", self.types), ("ancestors", self.ancestors)):
+            arrays[f"{name}_key"], arrays[f"{name}_value"] = flat(table)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: dict):
+        tables = []
+        for name in ("terms", "types", "ancestors"):
+            table = defaultdict(list)
+            for k, v in zip(arrays[f"{name}_key"].tolist(), arrays[f"{name}_value"].tolist()):
+                table[k].append(v)
+            tables.append(dict(table))
+        terms, types, ancestors = tables
+        return cls(terms, types, {c: frozenset(s) for c, s in ancestors.items()})
+
+    # ---------------------------------------------------------------
+    # Lookups
+    # ---------------------------------------------------------------
+    def lookup(self, term) -> list:
+        """
+        URIs of the ontology entities named `term` (local name or label), [] if none.
+        """
+        return self.terms.get(normalize(term), [])
+
+    def first(self, term):
+        uris = self.lookup(term)
+        return uris[0] if uris else None
+
+    def superclasses(self, uri) -> frozenset:
+        return self.ancestors.get(uri, frozenset())
+
+    def is_a(self, uri, cls_uri) -> bool:
+        """
+        True if `uri` is `cls_uri`, a subclass of it, or an instance of one of them.
+        """
+        if uri == cls_uri or cls_uri in self.superclasses(uri):
+            return True
+        return any(t == cls_uri or cls_uri in self.superclasses(t) for t in self.types.get(uri, ()))
+
+    def entity_type(self, uri):
+        """
+        Most informative rdf:type of an entity: its ontology class for an
+        individual (e.g. phy:Equation), else owl:Class, owl:ObjectProperty, ...
+        """
+        types = self.types.get(uri, [])
+        own = [t for t in types if not t.startswith((str(OWL), str(RDF), str(RDFS)))]
+        return (own or types or [None])[0]
+
+    def map_triple(self, triple) -> tuple:
+        """
+        (subj, pred, obj, subj_uri, pred_uri, obj_uri), None where the term is not
+        in the ontology. Replaces the notebook's two ASK queries per triple.
+        """
+        subj, pred, obj = triple
+        return (subj, pred, obj, self.first(subj), self.first(pred), self.first(obj))
+
+    def map_triples(self, triples) -> pd.DataFrame:
+        """
+        Batch mapping of (subject, predicate, object) triples (list or DataFrame
+        with these columns). Each distinct term is normalized and looked up once.
+        Adds {subject, predicate, object}_uri and subject/object _type columns.
+        """
+        df = triples if isinstance(triples, pd.DataFrame) else \
+            pd.DataFrame(list(triples), columns=["subject", "predicate", "object"])
+        df = df.copy()
+        for col in ("subject", "predicate", "object"):
+            codes, uniques = pd.factorize(df[col])
+            uris = np.array([self.first(u) for u in uniques] + [None], dtype=object)
+            df[f"{col}_uri"] = uris[codes]  # code -1 (missing term) -> None
+            if col != "predicate":
+                kinds = np.array([self.entity_type(u) if u else None for u in uris], dtype=object)
+                df[f"{col}_type"] = kinds[codes]
+        return df
+
+
+def _closure(node, parents) -> set:
+    seen, stack = set(), list(parents.get(node, ()))
+    while stack:
+        p = stack.pop()
+        if p not in seen:
+            seen.add(p)
+            stack.extend(parents.get(p, ()))
+    return seen
+
+
+if __name__ == "__main__":
+    index = OntologyIndex.from_file("PhySci/PhySci.ttl")
+    print(f"{len(index.types):,} entities, {len(index.terms):,} lookup keys")
+    print(index.map_triple(("equation", "confirmLaw", "Quantum_State")))
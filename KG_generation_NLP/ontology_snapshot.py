@@ -0,0 +1,170 @@
+import logging
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import rdflib
+from rdflib.namespace import XSD
+
+from ontology_index import OntologyIndex, load_ontology
+
+DATE_TYPES = (XSD.date, XSD.dateTime)
+# dd-mm-yyyy, dd/mm/yyyy or dd.mm.yyyy (PhySci: "01-07-2019"^^xsd:date)
+_DMY = re.compile(r"^(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})(.*)$")
+
+
+def fix_date_format(value: str) -> str:
+    """
+    ISO form of a day-first date ("01-07-2019" -> "2019-07-01"); any time part
+    is kept, other values are returned unchanged.
+    """
+    m = _DMY.match(str(value).strip())
+    if m is None:
+        return value
+    day, month, year, rest = m.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}{rest}"
+
+
+@contextmanager
+def quiet_literals():
+    """
+    rdflib logs a full traceback for every literal it cannot convert (the
+    non-ISO dates of PhySci); silenced while parsing, the dates are fixed after.
+    """
+    logger = logging.getLogger("rdflib.term")
+    level = logger.level
+    logger.setLevel(logging.CRITICAL)
+    try:
+        yield
+    finally:
+        logger.setLevel(level)
+
+
+def normalize_date_literals(g: rdflib.Graph) -> int:
+    """
+    Rewrites the xsd:date / xsd:dateTime literals of `g` in ISO form.
+    Returns the number of literals changed.
+    """
+    changes = []
+    for s, p, o in g:
+        if isinstance(o, rdflib.Literal) and o.datatype in DATE_TYPES:
+            fixed = fix_date_format(str(o))
+            if fixed != str(o):
+                changes.append((s, p, o, rdflib.Literal(fixed, datatype=o.datatype)))
+    for s, p, old, new in changes:
+        g.remove((s, p, old))
+        g.add((s, p, new))
+    return len(changes)
+
+
+def load_clean_ontology(path) -> rdflib.Graph:
+    """
+    Parses the ontology without the literal warnings and normalizes its dates.
+    """
+    with quiet_literals():
+        g = load_ontology(path)
+    n = normalize_date_literals(g)
+    bad = sum(1 for o in g.objects() if isinstance(o, rdflib.Literal) and o.ill_typed)
+    print(f"✔ {path}: {len(g):,} triples, {n} date literals normalized"
+          + (f", {bad} literals still ill-typed" if bad else ""))
+    return g
+
+
+# -------------------------------------------------------------------
+# Binary snapshot
+# -------------------------------------------------------------------
+def _term(t):
+    if isinstance(t, rdflib.Literal):
+        return str(t), "literal", str(t.datatype or ""), t.language or ""
+    if isinstance(t, rdflib.BNode):
+        return str(t), "bnode", "", ""
+    return str(t), "uri", "", ""
+
+
+def graph_arrays(g: rdflib.Graph) -> dict:
+    """
+    The triples of `g` as string arrays (subject, predicate, object plus the
+    object's kind, datatype and language).
+    """
+    rows = [(str(s), "bnode" if isinstance(s, rdflib.BNode) else "uri", str(p)) + _term(o)
+            for s, p, o in g]
+    cols = list(zip(*rows)) if rows else [()] * 7
+    names = ("s", "s_kind", "p", "o", "o_kind", "o_datatype", "o_lang")
+    return {f"triple_{n}": np.array(c, dtype=str) for n, c in zip(names, cols)}
+
+
+def arrays_graph(data: dict) -> rdflib.Graph:
+    """
+    Rebuilds the rdflib graph of graph_arrays (only needed for SPARQL or
+    serialization, the index does not use it).
+    """
+    g = rdflib.Graph()
+    with quiet_literals():
+        for s, sk, p, o, ok, dt, lang in zip(*(data[f"triple_{n}"] for n in
+                                               ("s", "s_kind", "p", "o", "o_kind", "o_datatype", "o_lang"))):
+            subj = rdflib.BNode(s) if sk == "bnode" else rdflib.URIRef(s)
+            if ok == "literal":
+                obj = rdflib.Literal(o, datatype=dt or None, lang=lang or None)
+            else:
+                obj = rdflib.BNode(o) if ok == "bnode" else rdflib.URIRef(o)
+            g.add((subj, rdflib.URIRef(p), obj))
+    return g
+
+
+def default_snapshot_path(source) -> Path:
+    """
+    {source}.snapshot.npz, extension kept: physci.rdf and physci.owl get one
+    snapshot each.
+    """
+    source = Path(source)
+    return source.with_name(source.name + ".snapshot.npz")
+
+
+def build_snapshot(source, snapshot_path=None) -> dict:
+    """
+    Parses `source` once, normalizes its dates and writes the cleaned triples
+    and the OntologyIndex tables into one compressed .npz.
+    """
+    snapshot_path = Path(snapshot_path) if snapshot_path else default_snapshot_path(source)
+    g = load_clean_ontology(source)
+    data = {**graph_arrays(g), **OntologyIndex.from_graph(g).to_arrays()}
+    stat = os.stat(source)
+    np.savez_compressed(snapshot_path, source_stamp=np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64),
+                        **data)
+    return data
+
+
+def load_snapshot(source="PhySci/PhySci.ttl", snapshot_path=None, rebuild: bool = False) -> dict:
+    """
+    Arrays of the ontology snapshot of `source`, rebuilt when the source file
+    changed (size / modification time) or if `rebuild`.
+    """
+    snapshot_path = Path(snapshot_path) if snapshot_path else default_snapshot_path(source)
+    stat = os.stat(source)
+    stamp = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+    if not rebuild and snapshot_path.exists():
+        with np.load(snapshot_path, allow_pickle=False) as data:
+            if np.array_equal(data["source_stamp"], stamp):
+                return {k: data[k] for k in data.files if k != "source_stamp"}
+    return build_snapshot(source, snapshot_path)
+
+
+def load_index(source="PhySci/PhySci.ttl", snapshot_path=None, rebuild: bool = False) -> OntologyIndex:
+    """
+    OntologyIndex of `source` from its snapshot, without parsing the ontology.
+    """
+    return OntologyIndex.from_arrays(load_snapshot(source, snapshot_path, rebuild))
+
+
+def load_graph(source="PhySci/PhySci.ttl", snapshot_path=None, rebuild: bool = False) -> rdflib.Graph:
+    """
+    Cleaned rdflib graph of `source` from its snapshot.
+    """
+    return arrays_graph(load_snapshot(source, snapshot_path, rebuild))
+
+
+if __name__ == "__main__":
+    for source in ("PhySci/PhySci.ttl", "PhySci/physci.rdf"):
+        build_snapshot(source)
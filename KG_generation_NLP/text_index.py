@@ -0,0 +1,328 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from concept_tagger import tokenize
+
+SEGMENT_ARRAYS = ("terms", "term_indptr", "post_doc", "post_tf", "pos_indptr", "positions",
+                  "paper_id", "year", "length")
+# Positions skipped between two fields (title, abstract) of a paper, so that
+# phrases and near() windows never run across the field boundary
+FIELD_GAP = 1000
+
+
+def analyze(text) -> list:
+    """
+    Word forms of a text (lower-cased, roughly singular, see concept_tagger.word_form),
+    used when the index is built without spaCy. Queries go through the same
+    function, so "Quantum Repeaters" finds "quantum repeater".
+    """
+    return [w for w, _, _ in tokenize(text)] if isinstance(text, str) else []
+
+
+def is_word(token) -> bool:
+    return not (token.is_punct or token.is_space)
+
+
+def chunk_key(tokens) -> str:
+    """
+    "np:" term of a noun phrase: lemmas of its words without stop words.
+    """
+    return "np:" + " ".join(t.lemma_.lower() for t in tokens if is_word(t) and not t.is_stop)
+
+
+def doc_words(doc):
+    """
+    Lemmas of the words of a spaCy Doc (punctuation and spaces dropped) and
+    (position, chunk_key) of its noun chunks, positions counted in those words.
+    """
+    word_pos = np.cumsum([is_word(t) for t in doc]) - 1
+    words = [t.lemma_.lower() for t in doc if is_word(t)]
+    chunks = []
+    for chunk in doc.noun_chunks:
+        first = next((t for t in chunk if is_word(t)), None)
+        key = chunk_key(chunk)
+        if first is not None and key != "np:":
+            chunks.append((int(word_pos[first.i]), key))
+    return words, chunks
+
+
+def build_segment(paper_ids, years, fields, nlp=None) -> dict:
+    """
+    Positional postings of a batch of papers (`fields`: the texts of each paper,
+    e.g. (title, abstract)), words from analyze, or lemmas and noun chunks
+    (doc_words) with a spaCy `nlp`:
+        terms (sorted), term_indptr -> postings of each term (post_doc, post_tf)
+        pos_indptr -> positions of each posting (word index, fields FIELD_GAP apart)
+        paper_id, year, length (words) of each document
+    """
+    tok_term, tok_doc, tok_pos, lengths = [], [], [], []
+    docs = iter(nlp.pipe([text for texts in fields for text in texts], batch_size=64)) if nlp is not None else None
+    for d, texts in enumerate(fields):
+        offset, n_words = 0, 0
+        for text in texts:
+            words, chunks = doc_words(next(docs)) if docs is not None else (analyze(text), [])
+            tok_term.extend(words)
+            tok_pos.extend(range(offset, offset + len(words)))
+            for pos, key in chunks:
+                tok_term.append(key)
+                tok_pos.append(offset + pos)
+            n_words += len(words)
+            offset += len(words) + FIELD_GAP
+        tok_doc.extend([d] * (len(tok_term) - len(tok_doc)))
+        lengths.append(n_words)
+
+    terms, term_code = np.unique(np.array(tok_term, dtype=str), return_inverse=True)
+    doc = np.array(tok_doc, dtype=np.int32)
+    pos = np.array(tok_pos, dtype=np.int32)
+    order = np.lexsort((pos, doc, term_code))
+    term_code, doc, pos = term_code[order], doc[order], pos[order]
+
+    # one posting per (term, document)
+    new = np.ones(len(doc), dtype=bool)
+    new[1:] = (np.diff(term_code) != 0) | (np.diff(doc) != 0)
+    starts = np.flatnonzero(new)
+    pos_indptr = np.r_[starts, len(doc)].astype(np.int64)
+    post_term = term_code[starts]
+    term_indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(post_term, minlength=len(terms)), out=term_indptr[1:])
+
+    return {
+        "terms": terms,
+        "term_indptr": term_indptr,
+        "post_doc": doc[starts],
+        "post_tf": np.diff(pos_indptr).astype(np.int32),
+        "pos_indptr": pos_indptr,
+        "positions": pos,
+        "paper_id": np.asarray(paper_ids, dtype=str),
+        "year": np.asarray(years, dtype=float),
+        "length": np.array(lengths, dtype=np.int32),
+    }
+
+
+def _years(seg, docs) -> pd.Series:
+    # years are stored as float (missing years are NaN), reported as integers
+    return pd.Series(np.asarray(seg["year"][docs])).astype("Int64")
+
+
+class TextIndex:
+    """
+    On-disk inverted index of the abstracts, made of segments (one folder of
+    .npy files per batch of added papers, opened memory-mapped). Adding papers
+    writes a new segment; queries run over all segments.
+    With a spaCy `nlp` the index holds lemmas and noun chunks instead of word
+    forms; it is recorded in meta.json, and queries then need `nlp` too.
+    """
+
+    def __init__(self, index_dir="text_index", nlp=None):
+        self.index_dir = index_dir
+        self.nlp = nlp
+        os.makedirs(index_dir, exist_ok=True)
+        self.meta_file = os.path.join(index_dir, "meta.json")
+        meta = {"segments": [], "lemmas": nlp is not None}
+        if os.path.exists(self.meta_file):
+            with open(self.meta_file, encoding="utf-8") as f:
+                meta = json.load(f)
+        self.lemmas = meta.get("lemmas", False)
+        if self.lemmas and nlp is None:
+            raise ValueError(f"{index_dir} holds spaCy lemmas: open it with the same `nlp`")
+        self.segments = [self._open(name) for name in meta["segments"]]
+
+    def _open(self, name) -> dict:
+        path = os.path.join(self.index_dir, name)
+        seg = {k: np.load(os.path.join(path, f"{k}.npy"), mmap_mode="r") for k in SEGMENT_ARRAYS}
+        seg["name"] = name
+        return seg
+
+    # ---------------------------------------------------------------
+    # Building / incremental update
+    # ---------------------------------------------------------------
+    def indexed_ids(self) -> set:
+        return {p for seg in self.segments for p in seg["paper_id"].tolist()}
+
+    def add(self, papers: pd.DataFrame, text_columns=("title", "abstract")) -> int:
+        """
+        Indexes the papers not indexed yet (paper_id, publication_year and the
+        text columns) as a new segment. A paper listed twice keeps its last row.
+        Returns the number of papers added.
+        """
+        papers = papers.assign(paper_id=papers["paper_id"].astype(str)).drop_duplicates("paper_id", keep="last")
+        papers = papers[~papers["paper_id"].isin(self.indexed_ids())]
+        if papers.empty:
+            return 0
+        fields = papers[list(text_columns)].fillna("").astype(str).itertuples(index=False, name=None)
+        seg = build_segment(papers["paper_id"], papers["publication_year"], list(fields),
+                            self.nlp if self.lemmas else None)
+
+        name = f"seg-{len(self.segments):05d}"
+        path = os.path.join(self.index_dir, name)
+        os.makedirs(path, exist_ok=True)
+        for k in SEGMENT_ARRAYS:
+            np.save(os.path.join(path, f"{k}.npy"), seg[k])
+        # the segment becomes visible only once it is complete
+        names = [s["name"] for s in self.segments] + [name]
+        with open(self.meta_file + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"segments": names, "lemmas": self.lemmas}, f)
+        os.replace(self.meta_file + ".tmp", self.meta_file)
+        self.segments.append(self._open(name))
+        return len(papers)
+
+    def add_csv(self, csv_file="quantum_computing_subtree_papers.csv", chunksize: int = 20000) -> int:
+        """
+        Indexes a papers CSV by chunks; re-running it after new rows were
+        appended only indexes the new papers.
+        """
+        total = 0
+        for chunk in pd.read_csv(csv_file, usecols=["paper_id", "title", "abstract", "publication_year"],
+                                 chunksize=chunksize):
+            total += self.add(chunk)
+        return total
+
+    # ---------------------------------------------------------------
+    # Postings
+    # ---------------------------------------------------------------
+    @property
+    def n_docs(self) -> int:
+        return sum(len(seg["paper_id"]) for seg in self.segments)
+
+    def _postings(self, seg, term):
+        """
+        (documents, term frequencies, slice of positions of each posting) of a
+        term in a segment.
+        """
+        i = np.searchsorted(seg["terms"], term)
+        if i >= len(seg["terms"]) or seg["terms"][i] != term:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64)
+        a, b = seg["term_indptr"][i], seg["term_indptr"][i + 1]
+        return np.asarray(seg["post_doc"][a:b]), np.asarray(seg["post_tf"][a:b]), np.arange(a, b)
+
+    def _keys(self, seg, term, shift: int = 0) -> np.ndarray:
+        """
+        Sorted (document << 32 | position - shift) keys of all occurrences of a term.
+        """
+        docs, tf, posting = self._postings(seg, term)
+        if len(docs) == 0:
+            return np.zeros(0, dtype=np.int64)
+        # the positions of a term's postings are one contiguous block
+        first, last = seg["pos_indptr"][posting[0]], seg["pos_indptr"][posting[-1] + 1]
+        pos = np.asarray(seg["positions"][first:last]).astype(np.int64) - shift
+        return np.sort((np.repeat(docs.astype(np.int64), tf) << 32) | (pos & 0xFFFFFFFF))
+
+    def document_frequency(self, term) -> int:
+        return sum(len(self._postings(seg, term)[0]) for seg in self.segments)
+
+    # ---------------------------------------------------------------
+    # Queries
+    # ---------------------------------------------------------------
+    def _words(self, text) -> list:
+        """
+        Query words, normalized like the indexed ones.
+        """
+        if not self.lemmas:
+            return analyze(text)
+        return doc_words(self.nlp(str(text)))[0]
+
+    def search(self, query: str, k: int = 10, k1: float = 1.2, b: float = 0.75) -> pd.DataFrame:
+        """
+        BM25 ranking of the papers for the words of `query`.
+        Returns (paper_id, year, score), best first.
+        """
+        terms = list(dict.fromkeys(self._words(query)))
+        n = self.n_docs
+        if n == 0 or not terms:
+            return pd.DataFrame(columns=["paper_id", "year", "score"])
+        avgdl = sum(int(seg["length"].sum()) for seg in self.segments) / n
+        idf = {t: np.log(1 + (n - (df := self.document_frequency(t)) + 0.5) / (df + 0.5)) for t in terms}
+
+        frames = []
+        for seg in self.segments:
+            scores = np.zeros(len(seg["paper_id"]))
+            norm = k1 * (1 - b + b * np.asarray(seg["length"]) / avgdl)
+            for t in terms:
+                docs, tf, _ = self._postings(seg, t)
+                scores[docs] += idf[t] * tf * (k1 + 1) / (tf + norm[docs])
+            hit = np.flatnonzero(scores > 0)
+            frames.append(pd.DataFrame({"paper_id": seg["paper_id"][hit], "year": _years(seg, hit),
+                                        "score": scores[hit]}))
+        result = pd.concat(frames, ignore_index=True)
+        return result.nlargest(k, "score").reset_index(drop=True)
+
+    def _phrase_keys(self, seg, words) -> np.ndarray:
+        """
+        Keys (document, start position) of the occurrences of consecutive `words`.
+        """
+        keys = self._keys(seg, words[0])
+        for i, w in enumerate(words[1:], 1):
+            if len(keys) == 0:
+                break
+            keys = np.intersect1d(keys, self._keys(seg, w, shift=i), assume_unique=True)
+        return keys
+
+    def _matches(self, phrase_keys_of_segment) -> pd.DataFrame:
+        frames = []
+        for seg in self.segments:
+            keys = phrase_keys_of_segment(seg)
+            docs, counts = np.unique(keys >> 32, return_counts=True)
+            frames.append(pd.DataFrame({"paper_id": seg["paper_id"][docs], "year": _years(seg, docs),
+                                        "occurrences": counts}))
+        if not frames:
+            return pd.DataFrame(columns=["paper_id", "year", "occurrences"])
+        return pd.concat(frames, ignore_index=True)
+
+    def phrase(self, text: str) -> pd.DataFrame:
+        """
+        Papers containing the exact phrase (words in this order, consecutive),
+        with the number of occurrences.
+        """
+        words = self._words(text)
+        if not words:
+            return self._matches(lambda seg: np.zeros(0, dtype=np.int64))
+        return self._matches(lambda seg: self._phrase_keys(seg, words))
+
+    def noun_phrase(self, text: str) -> pd.DataFrame:
+        """
+        Papers whose noun chunks include `text` (index built with `nlp`), the
+        query reduced like the indexed chunks (chunk_key: lemmas without stop
+        words), so "the quantum repeaters" finds "quantum repeater".
+        """
+        if not self.lemmas:
+            raise ValueError("noun phrases are only indexed when the index is built with `nlp`")
+        term = chunk_key(self.nlp(str(text)))
+        return self._matches(lambda seg: self._keys(seg, term))
+
+    def near(self, a: str, b: str, window: int = 5) -> pd.DataFrame:
+        """
+        Papers where phrase `a` and phrase `b` start at most `window` words
+        apart (in either order). Occurrences counted on `a`.
+        """
+        wa, wb = self._words(a), self._words(b)
+
+        def keys(seg):
+            ka = self._phrase_keys(seg, wa) if wa else np.zeros(0, dtype=np.int64)
+            kb = self._phrase_keys(seg, wb) if wb else np.zeros(0, dtype=np.int64)
+            if len(ka) == 0 or len(kb) == 0:
+                return np.zeros(0, dtype=np.int64)
+            # keys of b within [a - window, a + window] (same document: same high bits)
+            lo = np.searchsorted(kb, ka - window, "left")
+            hi = np.searchsorted(kb, ka + window, "right")
+            return ka[hi > lo]
+        return self._matches(keys)
+
+    def frequency_by_year(self, text: str) -> pd.DataFrame:
+        """
+        Per publication year, the number of papers mentioning the phrase and its
+        number of occurrences ("which papers mention 'quantum repeater' by year?").
+        """
+        hits = self.phrase(text)
+        return (hits.groupby("year")
+                .agg(papers=("paper_id", "size"), occurrences=("occurrences", "sum"))
+                .reset_index())
+
+
+if __name__ == "__main__":
+    index = TextIndex("text_index")
+    added = index.add_csv("quantum_computing_subtree_papers.csv")
+    print(f"✔ {added:,} papers added, {index.n_docs:,} in the index")
+    print(index.frequency_by_year("quantum repeater"))
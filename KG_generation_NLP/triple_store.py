@@ -0,0 +1,340 @@
+import ast
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+TRIPLE_COLUMNS = ["paper_id", "publication_year", "subject", "predicate", "object"]
+
+# Same windows as analysis.DEFAULT_CITATION_WINDOWS: (start, end) years around Y
+CITATION_WINDOWS = {
+    "citation_sum_year": (0, 0),   # citations in year Y
+    "citation_sum_year2": (0, 1),  # citations in years Y and Y+1
+}
+
+
+# -------------------------------------------------------------------
+# Inputs
+# -------------------------------------------------------------------
+def read_partitions(out_dir="kg_triples") -> pd.DataFrame:
+    """
+    Triples written by kg_job.py (part-*.csv or part-*.parquet; N-Triples
+    partitions have no publication year and cannot be read here). A paper found
+    in several partitions only keeps the rows of the last one, so a chunk
+    written twice is not counted twice.
+    """
+    paths = sorted(glob.glob(os.path.join(out_dir, "part-*.csv")) + glob.glob(os.path.join(out_dir, "part-*.parquet")))
+    if not paths:
+        raise FileNotFoundError(f"No part-*.csv or part-*.parquet partition in {out_dir} "
+                                "(run kg_job.py with sink='csv' or 'parquet')")
+    frames = []
+    for k, path in enumerate(paths):
+        df = pd.read_csv(path, usecols=TRIPLE_COLUMNS) if path.endswith(".csv") \
+            else pd.read_parquet(path, columns=TRIPLE_COLUMNS)
+        frames.append(df.assign(part=k))
+    df = pd.concat(frames, ignore_index=True)
+    df["paper_id"] = df["paper_id"].astype(str)
+    last = df.groupby("paper_id")["part"].transform("max")
+    return df[df["part"] == last].drop(columns="part").reset_index(drop=True)
+
+
+def read_processed(csv_file="processed_abstracts.csv") -> pd.DataFrame:
+    """
+    Triples of a CSV with one list of triples per paper in the `triples` cell
+    (nlp_pipeline.py output, notebook's enhanced_triples.csv).
+    """
+    df = pd.read_csv(csv_file, usecols=["paper_id", "publication_year", "triples"])
+    df["triples"] = df["triples"].map(lambda cell: ast.literal_eval(cell) if isinstance(cell, str) else [])
+    df = df.explode("triples").dropna(subset=["triples"])
+    spo = pd.DataFrame(df["triples"].tolist(), columns=["subject", "predicate", "object"], index=df.index)
+    return pd.concat([df[["paper_id", "publication_year"]], spo], axis=1).reset_index(drop=True)
+
+
+def citation_prefix(citations_csv):
+    """
+    (paper IDs, citation years, per-paper prefix sum of the cited_by_{year}
+    columns) of a papers CSV, as in analysis.analysis11_with_citations.
+    """
+    columns = pd.read_csv(citations_csv, nrows=0).columns
+    cite_cols = sorted((int(c.replace("cited_by_", "")), c) for c in columns if c.startswith("cited_by_"))
+    papers = pd.read_csv(citations_csv, usecols=["paper_id"] + [c for _, c in cite_cols])
+    papers = papers.drop_duplicates("paper_id", keep="last")
+    counts = papers[[c for _, c in cite_cols]].fillna(0).to_numpy(dtype=float)
+    prefix = np.hstack([np.zeros((len(papers), 1)), np.cumsum(counts, axis=1)])
+    return papers["paper_id"].astype(str).to_numpy(), np.array([y for y, _ in cite_cols]), prefix
+
+
+def window_sums(prefix, cite_years, rows, year, windows) -> np.ndarray:
+    """
+    Citations of the papers `rows` in each window around `year`
+    (analysis.window_citations). Shape (len(rows), len(windows)).
+    """
+    out = np.empty((len(rows), len(windows)))
+    for k, (start, end) in enumerate(windows.values()):
+        lo = 0 if start is None else np.searchsorted(cite_years, year + start, side="left")
+        hi = len(cite_years) if end is None else np.searchsorted(cite_years, year + end, side="right")
+        out[:, k] = prefix[rows, max(hi, lo)] - prefix[rows, lo]
+    return out
+
+
+# -------------------------------------------------------------------
+# Store
+# -------------------------------------------------------------------
+class TripleStore:
+    """
+    Deduplicated triples over interned term IDs:
+        terms                    term strings (ID = position)
+        s, p, o                  one row per distinct triple ("fact"), sorted in SPO order
+        pos, osp                 fact orders sorted by (p, o, s) and (o, s, p)
+        years, counts            facts × years occurrence counts (sparse)
+        occ_indptr, occ_year, occ_paper
+                                 supporting (year, paper) of each fact, CSR-like
+        papers                   paper IDs (occ_paper indexes this array)
+        n_papers                 number of distinct papers of each fact
+    """
+
+    ARRAYS = ("terms", "s", "p", "o", "pos", "osp", "years", "papers",
+              "occ_indptr", "occ_year", "occ_paper", "n_papers")
+
+    def __init__(self, **arrays):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.counts = arrays["counts"]
+        self._term_id = pd.Index(self.terms)
+        # sorted key columns of each order, gathered once: lookups only slice them
+        self._orders = {
+            "spo": (None, (self.s, self.p, self.o)),
+            "pos": (self.pos, (self.p[self.pos], self.o[self.pos])),
+            "osp": (self.osp, (self.o[self.osp], self.s[self.osp])),
+        }
+
+    @classmethod
+    def from_triples(cls, triples: pd.DataFrame):
+        """
+        Builds the store from rows (paper_id, publication_year, subject,
+        predicate, object). Terms are stripped and lower-cased before interning,
+        so "Entanglement" and "entanglement" are one term.
+        """
+        df = triples.dropna(subset=["subject", "predicate", "object", "publication_year"])
+        spo = [df[c].astype(str).str.strip().str.lower().to_numpy() for c in ("subject", "predicate", "object")]
+        codes, terms = pd.factorize(np.concatenate(spo))
+        n = len(df)
+        s, p, o = codes[:n], codes[n:2 * n], codes[2 * n:]
+
+        # facts: distinct (s, p, o), numbered in SPO order
+        fact, (fs, fp, fo) = _group_rows(s, p, o)
+
+        year_code, years = pd.factorize(df["publication_year"].astype(int).to_numpy(), sort=True)
+        paper_code, papers = pd.factorize(df["paper_id"].astype(str).to_numpy())
+        counts = sparse.csr_matrix((np.ones(n, dtype=np.int32), (fact, year_code)),
+                                   shape=(len(fs), len(years)))
+
+        # supporting papers: distinct (fact, year, paper), grouped by fact
+        _, (occ_fact, occ_year, occ_paper) = _group_rows(fact, year_code, paper_code)
+        occ_indptr = np.zeros(len(fs) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(occ_fact, minlength=len(fs)), out=occ_indptr[1:])
+        _, (paper_fact, _) = _group_rows(fact, paper_code)
+        n_papers = np.bincount(paper_fact, minlength=len(fs)).astype(np.int32)
+
+        return cls(terms=np.asarray(terms, dtype=str), s=fs.astype(np.int32), p=fp.astype(np.int32),
+                   o=fo.astype(np.int32), pos=np.lexsort((fs, fo, fp)), osp=np.lexsort((fp, fs, fo)),
+                   years=np.asarray(years), papers=np.asarray(papers, dtype=str), counts=counts,
+                   occ_indptr=occ_indptr, occ_year=occ_year.astype(np.int32), occ_paper=occ_paper.astype(np.int32),
+                   n_papers=n_papers)
+
+    # ---------------------------------------------------------------
+    # Persistence (one .npz, like the other caches of the project)
+    # ---------------------------------------------------------------
+    def save(self, path="triple_store.npz"):
+        c = self.counts.tocsr()
+        np.savez_compressed(path, counts_data=c.data, counts_indices=c.indices, counts_indptr=c.indptr,
+                            **{name: getattr(self, name) for name in self.ARRAYS})
+
+    @classmethod
+    def load(cls, path="triple_store.npz"):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in cls.ARRAYS}
+            arrays["counts"] = sparse.csr_matrix(
+                (data["counts_data"], data["counts_indices"], data["counts_indptr"]),
+                shape=(len(arrays["s"]), len(arrays["years"])))
+        return cls(**arrays)
+
+    # ---------------------------------------------------------------
+    # Lookups
+    # ---------------------------------------------------------------
+    def term_id(self, term) -> int:
+        """
+        ID of a term (same normalization as from_triples), -1 if unknown.
+        """
+        try:
+            return int(self._term_id.get_loc(str(term).strip().lower()))
+        except KeyError:
+            return -1
+
+    def _prefix(self, name, values) -> np.ndarray:
+        """
+        Facts whose first key columns in the `name` order equal `values`:
+        successive binary searches narrowing a range of that order.
+        """
+        order, columns = self._orders[name]
+        lo, hi = 0, len(self.s)
+        for col, value in zip(columns, values):
+            keys, value = col[lo:hi], col.dtype.type(value)  # same dtype: no copy of the column
+            lo, hi = lo + np.searchsorted(keys, value, "left"), lo + np.searchsorted(keys, value, "right")
+        return np.arange(lo, hi) if order is None else np.sort(order[lo:hi])
+
+    def find(self, s=None, p=None, o=None) -> np.ndarray:
+        """
+        Fact numbers matching the bound terms (None = any), using the SPO, POS or
+        OSP order whose prefix covers them.
+        """
+        bound = {k: self.term_id(v) for k, v in (("s", s), ("p", p), ("o", o)) if v is not None}
+        if any(v < 0 for v in bound.values()):
+            return np.zeros(0, dtype=np.int64)
+        if "s" in bound and ("p" in bound or "o" not in bound):
+            return self._prefix("spo", [bound[k] for k in ("s", "p", "o") if k in bound])
+        if "s" in bound:
+            return self._prefix("osp", (bound["o"], bound["s"]))
+        if "p" in bound:
+            return self._prefix("pos", [bound[k] for k in ("p", "o") if k in bound])
+        if "o" in bound:
+            return self._prefix("osp", (bound["o"],))
+        return np.arange(len(self.s))
+
+    def _table(self, facts, counts) -> pd.DataFrame:
+        return pd.DataFrame({
+            "subject": self.terms[self.s[facts]],
+            "predicate": self.terms[self.p[facts]],
+            "object": self.terms[self.o[facts]],
+            "count": counts,
+            "papers": self.n_papers[facts],
+        })
+
+    def match(self, s=None, p=None, o=None) -> pd.DataFrame:
+        """
+        Triples matching the pattern with their total occurrence count and number
+        of supporting papers (over all years).
+        """
+        facts = self.find(s, p, o)
+        return self._table(facts, np.asarray(self.counts[facts].sum(axis=1)).ravel())
+
+    def counts_by_year(self, s, p, o) -> pd.Series:
+        """
+        Occurrences of one triple per year, e.g. ("entanglement", "affect", "state").
+        """
+        facts = self.find(s, p, o)
+        values = np.asarray(self.counts[facts].sum(axis=0)).ravel()
+        return pd.Series(values, index=self.years, name="count")
+
+    def supporting_papers(self, s, p, o) -> pd.DataFrame:
+        """
+        (year, paper_id) of the papers in which the triple was extracted.
+        """
+        facts = self.find(s, p, o)
+        rows = np.concatenate([np.arange(self.occ_indptr[f], self.occ_indptr[f + 1]) for f in facts]) \
+            if len(facts) else np.zeros(0, dtype=np.int64)
+        return pd.DataFrame({"year": self.years[self.occ_year[rows]], "paper_id": self.papers[self.occ_paper[rows]]})
+
+    # ---------------------------------------------------------------
+    # Time slices
+    # ---------------------------------------------------------------
+    def year_slice(self, first: int, last: int = None) -> pd.DataFrame:
+        """
+        Triples occurring between `first` and `last` (included, last = first by
+        default) with their occurrence count in that period.
+        """
+        last = first if last is None else last
+        cols = np.flatnonzero((self.years >= first) & (self.years <= last))
+        counts = np.asarray(self.counts[:, cols].sum(axis=1)).ravel()
+        facts = np.flatnonzero(counts > 0)
+        table = self._table(facts, counts[facts])
+        in_period = (self.years[self.occ_year] >= first) & (self.years[self.occ_year] <= last)
+        fact_of = np.repeat(np.arange(len(self.s)), np.diff(self.occ_indptr))
+        table["papers"] = np.bincount(fact_of[in_period], minlength=len(self.s))[facts]
+        return table
+
+    def write_edge_files(self, out_dir="triple_edges", predicate=None, cumulative: bool = False,
+                         citations_csv=None, windows: dict = None):
+        """
+        One edges_{year}.csv per year in the layout of the concept co-occurrence
+        edge files (source, target, source_idx, target_idx, pair_key, weight and
+        the citation columns): subject and object as an unordered pair of term
+        IDs (source = the smaller ID, not the first name alphabetically), weight =
+        occurrences (of `predicate` only if given), summed over the predicates.
+        With `citations_csv` (papers with cited_by_{year} columns), each window of
+        `windows` (default CITATION_WINDOWS) sums the citations of the distinct
+        papers supporting the pair, around the year of the file, as
+        analysis.window_citations does for the concept pairs. `cumulative` counts
+        every year up to the file's year.
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        windows = dict(windows or CITATION_WINDOWS)
+        keep = np.ones(len(self.s), dtype=bool)
+        if predicate is not None:
+            keep = self.p == self.term_id(predicate)
+        lo, hi = np.minimum(self.s, self.o).astype(np.int64), np.maximum(self.s, self.o).astype(np.int64)
+        pair_key = (lo << 32) | hi  # same packing as concept_tensor.pack_pair_key
+
+        citations = None
+        if citations_csv is not None:
+            paper_ids, cite_years, prefix = citation_prefix(citations_csv)
+            # papers missing from the citation table point to a last, all-zero row
+            paper_row = pd.Series(np.arange(len(paper_ids)), index=paper_ids) \
+                .reindex(self.papers).fillna(len(paper_ids)).to_numpy(dtype=np.int64)
+            prefix = np.vstack([prefix, np.zeros((1, prefix.shape[1]))])
+            occ_fact = np.repeat(np.arange(len(self.s)), np.diff(self.occ_indptr))
+            occ_ok = keep[occ_fact] & (lo != hi)[occ_fact]
+            citations = (pair_key[occ_fact[occ_ok]], self.occ_year[occ_ok], self.occ_paper[occ_ok])
+
+        for k, year in enumerate(self.years):
+            cols = slice(0, k + 1) if cumulative else slice(k, k + 1)
+            weight = np.asarray(self.counts[:, cols].sum(axis=1)).ravel()
+            sel = keep & (weight > 0) & (lo != hi)
+            edges = (pd.DataFrame({"pair_key": pair_key[sel], "weight": weight[sel]})
+                     .groupby("pair_key", as_index=False)["weight"].sum())
+            i, j = edges["pair_key"].to_numpy() >> 32, edges["pair_key"].to_numpy() & 0xFFFFFFFF
+            edges.insert(0, "source", self.terms[i])
+            edges.insert(1, "target", self.terms[j])
+            edges.insert(2, "source_idx", i)
+            edges.insert(3, "target_idx", j)
+
+            if citations is not None:
+                occ_key, occ_year, occ_paper = citations
+                in_year = occ_year <= k if cumulative else occ_year == k
+                # each paper counted once per pair, whatever the number of its facts
+                support = pd.DataFrame({"pair_key": occ_key[in_year], "paper": occ_paper[in_year]}).drop_duplicates()
+                sums = window_sums(prefix, cite_years, paper_row[support["paper"].to_numpy()], year, windows)
+                sums = pd.DataFrame(sums, columns=list(windows)).groupby(support["pair_key"].to_numpy()).sum()
+                for name in windows:
+                    edges[name] = sums[name].reindex(edges["pair_key"]).fillna(0).to_numpy()
+            edges.to_csv(os.path.join(out_dir, f"edges_{year}.csv"), index=False)
+
+
+def _group_rows(*columns):
+    """
+    Distinct rows of integer columns: (group number of each row, columns of the
+    distinct rows), groups numbered in lexicographic order.
+    """
+    order = np.lexsort(columns[::-1])
+    n = len(order)
+    new = np.zeros(n, dtype=bool)
+    new[:1] = True
+    for col in columns:
+        new[1:] |= np.diff(col[order]) != 0
+    group = np.empty(n, dtype=np.int64)
+    group[order] = np.cumsum(new) - 1
+    return group, [col[order][new] for col in columns]
+
+
+if __name__ == "__main__":
+    store = TripleStore.from_triples(read_partitions("kg_triples"))
+    store.save("triple_store.npz")
+    print(f"✔ {len(store.s):,} distinct triples, {len(store.terms):,} terms, {len(store.papers):,} papers")
+    # citations of the papers: cited_by_{year} columns (citation_network/citation_counts.py)
+    citations = "quantum_computing_subtree_papers_cites.csv"
+    if not os.path.exists(citations):
+        print(f"⚠ {citations} not found: edge files written without citation columns")
+        citations = None
+    store.write_edge_files("triple_edges", citations_csv=citations)
@@ -3,9 +3,13 @@ import os, itertools, collections
 import requests
 from tqdm import tqdm
 from sklearn.preprocessing import MultiLabelBinarizer
+from scipy import sparse
+import numpy as np
 import pandas as pd
 import random
 
+from concept_tensor import build_concept_vocabulary, pack_pair_key, save_concept_tensor
+
 # Directory for storing results
 root = r"C:/results/"
 os.makedirs(root, exist_ok=True)
@@ -63,17 +67,63 @@ def mainlog():
     df.to_csv(output_csv, index=False)
     print(f"Augmented CSV saved as {output_csv}")
 
-def analysis11_with_citations(level_threshold: int = 4):
+def weight_quantile(weights, q: float) -> float:
+    """
+    Exact q-quantile of integer co-occurrence counts, computed from their histogram
+    (same linear interpolation as pandas.Series.quantile).
+    Counts are small integers, so the histogram needs O(max weight) memory whatever
+    the number of pairs, and histograms of several chunks can simply be added.
+    """
+    hist = np.bincount(np.asarray(weights, dtype=np.int64))
+    cum = np.cumsum(hist)
+    n = cum[-1] if len(cum) else 0
+    if n == 0:
+        return np.nan
+    pos = (n - 1) * q
+    lo = np.searchsorted(cum, np.floor(pos), side="right")
+    hi = np.searchsorted(cum, np.ceil(pos), side="right")
+    return lo + (hi - lo) * (pos - np.floor(pos))
+
+# Citation windows written in the edge files: name -> (first, last) year offset
+# relative to the edge year Y, both inclusive. None means "from the first" /
+# "up to the last" year available, e.g. (1, None) = all future citations,
+# (-2, 0) = trailing window Y-2..Y.
+DEFAULT_CITATION_WINDOWS = {
+    "citation_sum_year": (0, 0),   # citations in year Y
+    "citation_sum_year2": (0, 1),  # citations in years Y and Y+1
+}
+
+def window_citations(prefix, cite_years, rows, year, windows) -> np.ndarray:
+    """
+    Citations of the papers `rows` in each window around `year`.
+    `prefix` is the per-paper prefix sum over `cite_years` (prefix[:, k] = citations
+    in the first k years), so each window costs one subtraction per paper.
+    Returns an array of shape (len(rows), len(windows)).
+    """
+    out = np.empty((len(rows), len(windows)))
+    for k, (start, end) in enumerate(windows.values()):
+        lo = 0 if start is None else np.searchsorted(cite_years, year + start, side="left")
+        hi = len(cite_years) if end is None else np.searchsorted(cite_years, year + end, side="right")
+        out[:, k] = prefix[rows, max(hi, lo)] - prefix[rows, lo]
+    return out
+
+def analysis11_with_citations(level_threshold: int = 4, keep_quantile: float = 0.95,
+                              citation_windows: dict = None):
     """
     Main analysis function. Builds yearly concept–co-occurrence edge lists for papers,
-    keeping only concepts with OpenAlex level >= `level_threshold`.
-    Adds citation columns to each edge file:
+    keeping only concepts with OpenAlex level >= `level_threshold` and, for each year,
+    only the edges whose weight is above the `keep_quantile` quantile.
+    Adds one citation column per window of `citation_windows` to each edge file
+    (see DEFAULT_CITATION_WINDOWS), by default:
         - citation_sum_year: citations in year Y
         - citation_sum_year2: citations in years Y and Y+1
+    All years share one concept vocabulary (concept_vocabulary.csv) and the kept
+    edges are also stacked into a year × concept × concept tensor (concept_tensor.npz).
     """
 
     ROOT = r"C:/results/"
     EDGE_DIR = Path(ROOT, "raw_graph1")
+    windows = dict(citation_windows or DEFAULT_CITATION_WINDOWS)
     EDGE_DIR.mkdir(parents=True, exist_ok=True)
 
     # 1. Load input tables
@@ -126,7 +176,7 @@ def analysis11_with_citations(level_threshold: int = 4):
     print(f"✔ kept {len(long_df):,} paper–concept relations after level ≥ {level_threshold}")
 
     # 3. Prepare “bag of concepts” per paper for each year
-    df = long_df[["paper_id", "publication_year", "concept"]].drop_duplicates()
+    df = long_df[["paper_id", "publication_year", "concept_id", "concept"]].drop_duplicates()
     # Clean up concept names
     df["concept"] = (
         df["concept"]
@@ -135,6 +185,11 @@ def analysis11_with_citations(level_threshold: int = 4):
         .str.replace(r'\s+', '_', regex=True)
     )
 
+    # Global vocabulary: the same concept index is used for every year
+    vocab = build_concept_vocabulary(df)
+    vocab.to_csv(Path(ROOT, "concept_vocabulary.csv"), index=False)
+    vocab_concepts = vocab["concept"].to_numpy()
+
     # Group into concept lists (bags) per paper per year
     paper_bags = (
         df.groupby(["publication_year", "paper_id"])["concept"]
@@ -142,87 +197,79 @@ def analysis11_with_citations(level_threshold: int = 4):
         .reset_index(name="concept_list")
     )
 
-    # 4. Build a lookup table for citations: (paper_id, year) -> number of citations
-    citation_lookup = {}
-    for col in data.columns:
-        if col.startswith("cited_by_"):
-            year = int(col.replace("cited_by_", ""))
-            for i, row in data.iterrows():
-                citation_lookup[(row["paper_id"], year)] = row[col]
+    # 4. Citations as a (paper × year) array and its prefix sum along the years
+    cite_cols = sorted((int(c.replace("cited_by_", "")), c) for c in data.columns if c.startswith("cited_by_"))
+    cite_years = np.array([y for y, _ in cite_cols])
+    papers = data.drop_duplicates("paper_id", keep="last")
+    counts = papers[[c for _, c in cite_cols]].fillna(0).to_numpy(dtype=float)
+    prefix = np.hstack([np.zeros((len(papers), 1)), np.cumsum(counts, axis=1)])
+    paper_row = pd.Series(np.arange(len(papers)), index=papers["paper_id"])
 
     # 5. Build yearly concept co-occurrence edge lists
     def yearly_edge_list(bags_year, year):
         """
         Builds the undirected co-occurrence edge list for a year.
         Each edge is (source concept, target concept, weight), where weight is number of co-occurrences.
-        Also adds citation sums for the given year and year+1.
+        Edges below the `keep_quantile` weight cutoff are dropped first, then only the
+        kept edges get their citation sums, one column per citation window.
+        Each unordered pair is listed once (source_idx < target_idx, indices of the
+        global vocabulary) with its packed int64 `pair_key`.
         """
-        mlb = MultiLabelBinarizer(sparse_output=True)
+        mlb = MultiLabelBinarizer(classes=vocab_concepts, sparse_output=True)
         M = mlb.fit_transform(bags_year["concept_list"])
         concepts = mlb.classes_
 
         # Compute co-occurrence matrix
         C = (M.T @ M)
-        C.setdiag(0)
+        # Upper triangle only: the matrix is symmetric, keep each pair once
+        C = sparse.triu(C, k=1)
         C.eliminate_zeros()
 
         coo = C.tocoo()
         edges = pd.DataFrame({
             "source": concepts[coo.row],
             "target": concepts[coo.col],
+            "source_idx": coo.row,
+            "target_idx": coo.col,
+            "pair_key": pack_pair_key(coo.row, coo.col),
             "weight": coo.data
         })
 
-        # For each concept pair, sum citations of papers where they co-occur
-        paper_year = bags_year.set_index("paper_id")
-        paper_ids = paper_year.index.unique()
-
-        pair2cites1 = collections.defaultdict(float)  # Citations in year Y
-        pair2cites2 = collections.defaultdict(float)  # Citations in years Y and Y+1
-
-        for pid in paper_ids:
-            concept_list = paper_year.loc[pid]["concept_list"]
-            if isinstance(concept_list, list):
-                concepts = sorted(set(concept_list))
-            else:
-                # If it's a Series of one list
-                concepts = sorted(set(concept_list.iloc[0]))
-
-            c1c2_pairs = itertools.combinations(concepts, 2)
+        # Keep only the most frequent edges before the (costly) citation enrichment
+        if not edges.empty:
+            qcut = weight_quantile(edges["weight"], keep_quantile)
+            edges = edges[edges["weight"] >= qcut].reset_index(drop=True)
 
-            cites_y1 = citation_lookup.get((pid, year), 0)
-            cites_y2 = cites_y1 + citation_lookup.get((pid, year + 1), 0)
+        # For each kept pair, sum citations of papers where they co-occur:
+        # column i of `both` flags the papers containing both concepts of edge i
+        M = M.tocsc()
+        both = M[:, edges["source_idx"]].multiply(M[:, edges["target_idx"]]).tocsr()
 
-            for c1, c2 in c1c2_pairs:
-                key = tuple(sorted((c1, c2)))
-                pair2cites1[key] += cites_y1
-                pair2cites2[key] += cites_y2
+        rows = paper_row.reindex(bags_year["paper_id"]).to_numpy()
+        cites = window_citations(prefix, cite_years, rows, year, windows)  # papers × windows
 
-        # Add citation sums to edge DataFrame
-        edges["citation_sum_year"] = [
-            pair2cites1.get(tuple(sorted((s, t))), 0.0)
-            for s, t in zip(edges["source"], edges["target"])
-        ]
-        edges["citation_sum_year2"] = [
-            pair2cites2.get(tuple(sorted((s, t))), 0.0)
-            for s, t in zip(edges["source"], edges["target"])
-        ]
+        # all windows in one product: (edges × papers) @ (papers × windows)
+        sums = both.T @ cites
+        for k, name in enumerate(windows):
+            edges[name] = sums[:, k]
 
         return edges
 
     # For each year, build the edge list and save as CSV
+    year_edges = {}
     for year, bags_year in tqdm(paper_bags.groupby("publication_year"),
                                 total=paper_bags["publication_year"].nunique(),
                                 desc="Building enriched yearly edges"):
         edges = yearly_edge_list(bags_year, year)
-
-        if not edges.empty:
-            # Keep only top 5% most frequent edges
-            qcut = edges["weight"].quantile(0.95)
-            edges = edges[edges["weight"] >= qcut]
-
         edges.to_csv(EDGE_DIR / f"edges_{year}.csv", index=False)
+        year_edges[year] = edges
         print(f"✅ {year}: {len(edges):,} edges saved with citations")
 
-#mainlog()  # Uncomment to run the data augmentation step first
-analysis11_with_citations()  # Builds co-occurrence graphs
\ No newline at end of file
+    # Stack all years into one sparse tensor on the global vocabulary
+    save_concept_tensor(Path(ROOT, "concept_tensor.npz"), vocab, year_edges,
+                        value_columns=["weight", *windows])
+    print(f"✔ concept tensor saved ({len(vocab):,} concepts × {len(year_edges)} years)")
+
+if __name__ == "__main__":
+    #mainlog()  # Uncomment to run the data augmentation step first
+    analysis11_with_citations()  # Builds co-occurrence graphs
\ No newline at end of file
@@ -0,0 +1,172 @@
+from pathlib import Path
+from collections import deque
+import re
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.linear_model import SGDRegressor
+from sklearn.preprocessing import StandardScaler
+
+from concept_tensor import unpack_pair_key
+
+ROOT = r"C:/results/"
+EDGE_DIR = Path(ROOT, "raw_graph1")
+FEATURE_DIR = Path(ROOT, "features")
+
+HISTORY = 3
+COUNT_FEATURES = (["weight", "citation_sum_year"]
+                  + [f"weight_lag{k}" for k in range(1, HISTORY + 1)]
+                  + [f"cites_lag{k}" for k in range(1, HISTORY + 1)])
+FEATURES = COUNT_FEATURES + ["weight_growth", "cites_growth", "pair_age", "adamic_adar"]
+
+
+def _edge_files(edge_dir: Path):
+    pat = re.compile(r"edges_(\d{4})\.csv")
+    return sorted((int(pat.search(f.name).group(1)), f) for f in Path(edge_dir).glob("edges_*.csv"))
+
+
+def adamic_adar_scores(pair_keys) -> np.ndarray:
+    """
+    Adamic-Adar index of every pair in the graph formed by the pairs themselves:
+    AA(x, y) = Σ_z 1/log|Γ(z)| over common neighbours z, i.e. (A·D·A)[x, y]
+    with D = diag(1/log deg). Computed with two sparse products.
+    """
+    pair_keys = np.asarray(pair_keys, dtype=np.int64)
+    if len(pair_keys) == 0:
+        return np.zeros(0)
+    i, j = unpack_pair_key(pair_keys)
+    n = int(max(i.max(), j.max())) + 1
+    A = sparse.coo_matrix((np.ones(len(i)), (i, j)), shape=(n, n)).tocsr()
+    A = ((A + A.T) > 0).astype(float)
+    deg = np.asarray(A.sum(axis=1)).ravel()
+    inv_log = np.divide(1.0, np.log(np.maximum(deg, 1)), out=np.zeros(n), where=deg > 1)
+    AA = A @ sparse.diags(inv_log) @ A
+    return np.asarray(AA[i, j]).ravel()
+
+
+def build_feature_store(edge_dir: Path = EDGE_DIR, out_dir: Path = FEATURE_DIR,
+                        history: int = HISTORY) -> list:
+    """
+    Streams the yearly edge files in year order and writes one feature file per year
+    (features_{year}.csv, keyed by pair_key). Only the last `history` years and the
+    first year of each pair are kept in memory. Features:
+        - weight, citation_sum_year of the year
+        - weight_lag{k}, cites_lag{k}: values k years before (0 if absent)
+        - weight_growth, cites_growth: (value + 1) / (value one year before + 1)
+        - pair_age: years since the pair first appeared
+        - adamic_adar: Adamic-Adar index of the pair in that year's graph
+    Returns the list of years written.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    past = deque(maxlen=history)          # (year, DataFrame indexed by pair_key)
+    first_year = pd.Series(dtype=np.int64)
+    years = []
+
+    for year, f in _edge_files(edge_dir):
+        edges = pd.read_csv(f, usecols=["pair_key", "weight", "citation_sum_year"])
+        edges = edges.set_index("pair_key")
+        feats = edges.astype(float)
+
+        lagged = {y: df for y, df in past}
+        for k in range(1, history + 1):
+            prev = lagged.get(year - k)
+            prev = prev.reindex(feats.index) if prev is not None else None
+            feats[f"weight_lag{k}"] = prev["weight"].fillna(0).to_numpy() if prev is not None else 0.0
+            feats[f"cites_lag{k}"] = prev["citation_sum_year"].fillna(0).to_numpy() if prev is not None else 0.0
+
+        feats["weight_growth"] = (feats["weight"] + 1) / (feats["weight_lag1"] + 1)
+        feats["cites_growth"] = (feats["citation_sum_year"] + 1) / (feats["cites_lag1"] + 1)
+
+        new = feats.index.difference(first_year.index)
+        first_year = pd.concat([first_year, pd.Series(year, index=new, dtype=np.int64)])
+        feats["pair_age"] = year - first_year.reindex(feats.index).to_numpy()
+        feats["adamic_adar"] = adamic_adar_scores(feats.index.to_numpy())
+
+        feats.reset_index().to_csv(out_dir / f"features_{year}.csv", index=False)
+        past.append((year, edges))
+        years.append(year)
+        print(f"✔ features {year}: {len(feats):,} pairs")
+
+    return years
+
+
+def _transform(df: pd.DataFrame) -> np.ndarray:
+    X = df[FEATURES].to_numpy(dtype=float)
+    n = len(COUNT_FEATURES)
+    # counts are heavy-tailed: learn on log1p, and on log of the growth ratios
+    X[:, :n] = np.log1p(X[:, :n])
+    X[:, n:n + 2] = np.log(X[:, n:n + 2])
+    return X
+
+
+def iter_training_chunks(feature_dir: Path, years, chunksize: int = 200_000):
+    """
+    Yields (year, X, y) where y is log1p of the pair's citations in year + 1.
+    Pairs absent the following year are skipped. The target year is joined on
+    pair_key; the feature file of `year` is read in chunks.
+    """
+    feature_dir = Path(feature_dir)
+    for year in years:
+        nxt = feature_dir / f"features_{year + 1}.csv"
+        if not nxt.exists():
+            continue
+        target = pd.read_csv(nxt, usecols=["pair_key", "citation_sum_year"]) \
+                   .rename(columns={"citation_sum_year": "next_citations"})
+        for chunk in pd.read_csv(feature_dir / f"features_{year}.csv", chunksize=chunksize):
+            chunk = chunk.merge(target, on="pair_key", how="inner")
+            if not chunk.empty:
+                yield year, _transform(chunk), np.log1p(chunk["next_citations"].to_numpy(dtype=float))
+
+
+def train_incremental(feature_dir: Path = FEATURE_DIR, epochs: int = 5,
+                      chunksize: int = 200_000, seed: int = 42):
+    """
+    Trains a linear model with partial_fit over the streamed pair-year features.
+    The last year with a known target is held out for evaluation.
+    Returns (scaler, model, report) where report has the held-out R² (log scale)
+    and the number of training / test rows.
+    """
+    pat = re.compile(r"features_(\d{4})\.csv")
+    years = sorted(int(pat.search(f.name).group(1)) for f in Path(feature_dir).glob("features_*.csv"))
+    labelled = [y for y in years if y + 1 in years]
+    if len(labelled) < 2:
+        raise ValueError("Need at least three consecutive years of features")
+    train_years, test_year = labelled[:-1], labelled[-1]
+
+    scaler = StandardScaler()
+    n_train = 0
+    for _, X, _ in iter_training_chunks(feature_dir, train_years, chunksize):
+        scaler.partial_fit(X)
+        n_train += len(X)
+
+    model = SGDRegressor(penalty="l2", alpha=1e-4, learning_rate="invscaling",
+                         eta0=0.01, random_state=seed)
+    for _ in range(epochs):
+        for _, X, y in iter_training_chunks(feature_dir, train_years, chunksize):
+            model.partial_fit(scaler.transform(X), y)
+
+    # held-out R² from running sums, the test year is streamed as well
+    sse = ysum = y2sum = 0.0
+    n_test = 0
+    for _, X, y in iter_training_chunks(feature_dir, [test_year], chunksize):
+        pred = model.predict(scaler.transform(X))
+        sse += ((y - pred) ** 2).sum()
+        ysum += y.sum()
+        y2sum += (y ** 2).sum()
+        n_test += len(y)
+    sst = y2sum - ysum ** 2 / n_test if n_test else 0.0
+
+    report = {"test_year": test_year, "n_train": n_train, "n_test": n_test,
+              "r2_log": 1 - sse / sst if sst > 0 else np.nan}
+    return scaler, model, report
+
+
+if __name__ == "__main__":
+    build_feature_store(EDGE_DIR, FEATURE_DIR)
+    scaler, model, report = train_incremental(FEATURE_DIR)
+    print("\nIncremental model for next-year citation_sum_year (log1p):")
+    print(f"trained on {report['n_train']:,} pair-years, tested on {report['test_year']} "
+          f"({report['n_test']:,} pairs) -> R^2: {report['r2_log']:.3f}")
+    for name, coef in zip(FEATURES, model.coef_):
+        print(f"  {name:>18}: {coef:+.3f}")
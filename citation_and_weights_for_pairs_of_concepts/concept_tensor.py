@@ -0,0 +1,156 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Default location of the persisted tensor (next to the yearly edge lists)
+ROOT = r"C:/results/"
+TENSOR_PATH = Path(ROOT, "concept_tensor.npz")
+VOCAB_PATH = Path(ROOT, "concept_vocabulary.csv")
+
+VALUE_COLUMNS = ("weight", "citation_sum_year", "citation_sum_year2")
+
+
+def pack_pair_key(source_idx, target_idx):
+    """
+    Packs an unordered pair of concept indices into one int64 key
+    (smaller index in the high 32 bits). Works on scalars and arrays.
+    """
+    i = np.asarray(source_idx, dtype=np.int64)
+    j = np.asarray(target_idx, dtype=np.int64)
+    return (np.minimum(i, j) << 32) | np.maximum(i, j)
+
+
+def unpack_pair_key(pair_key):
+    """
+    Inverse of `pack_pair_key`: returns (source_idx, target_idx).
+    """
+    key = np.asarray(pair_key, dtype=np.int64)
+    return key >> 32, key & 0xFFFFFFFF
+
+
+def build_concept_vocabulary(long_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Builds the global concept vocabulary shared by every year.
+    `long_df` needs the columns 'concept_id' and 'concept' (already normalized).
+    Returns a table (concept_idx, concept, concept_id) sorted by concept name,
+    so that concept_idx is stable for a given set of concepts.
+    """
+    vocab = (
+        long_df[["concept", "concept_id"]]
+        .drop_duplicates(subset="concept")
+        .sort_values("concept")
+        .reset_index(drop=True)
+    )
+    vocab.insert(0, "concept_idx", np.arange(len(vocab), dtype=np.int32))
+    return vocab
+
+
+def save_concept_tensor(path: Path, vocab: pd.DataFrame, year_edges: dict,
+                        value_columns=VALUE_COLUMNS):
+    """
+    Stacks the yearly edge lists into a year × concept × concept sparse tensor.
+    `year_edges` maps year -> edges DataFrame with 'source_idx', 'target_idx'
+    and the `value_columns`. Only the upper triangle (source_idx < target_idx)
+    is stored, each unordered pair appears once per year.
+    """
+    years = np.array(sorted(year_edges), dtype=np.int32)
+    year_pos, rows, cols = [], [], []
+    values = {c: [] for c in value_columns}
+
+    for k, year in enumerate(years):
+        edges = year_edges[year]
+        if edges.empty:
+            continue
+        i = edges["source_idx"].to_numpy(dtype=np.int32)
+        j = edges["target_idx"].to_numpy(dtype=np.int32)
+        keep = i != j
+        lo, hi = np.minimum(i, j)[keep], np.maximum(i, j)[keep]
+        # Symmetric inputs would list each pair twice: keep the first one
+        _, first = np.unique(pack_pair_key(lo, hi), return_index=True)
+        year_pos.append(np.full(len(first), k, dtype=np.int32))
+        rows.append(lo[first])
+        cols.append(hi[first])
+        for c in value_columns:
+            col = edges[c].to_numpy(dtype=np.float64) if c in edges else np.zeros(len(edges))
+            values[c].append(col[keep][first])
+
+    def cat(parts, dtype):
+        return np.concatenate(parts).astype(dtype) if parts else np.zeros(0, dtype=dtype)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        path,
+        years=years,
+        concepts=vocab["concept"].to_numpy(dtype=str),
+        concept_ids=vocab["concept_id"].to_numpy(dtype=str),
+        year_pos=cat(year_pos, np.int32),
+        row=cat(rows, np.int32),
+        col=cat(cols, np.int32),
+        **{c: cat(values[c], np.float64) for c in value_columns},
+    )
+
+
+def load_concept_tensor(path: Path = TENSOR_PATH) -> dict:
+    """
+    Loads a tensor written by `save_concept_tensor` into a plain dict of arrays.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        return {k: data[k] for k in data.files}
+
+
+def year_matrix(tensor: dict, year: int, value: str = "weight") -> sparse.csr_matrix:
+    """
+    Returns the symmetric concept × concept matrix of `value` for one year.
+    """
+    n = len(tensor["concepts"])
+    k = np.searchsorted(tensor["years"], year)
+    if k == len(tensor["years"]) or tensor["years"][k] != year:
+        return sparse.csr_matrix((n, n))
+    sel = tensor["year_pos"] == k
+    upper = sparse.coo_matrix(
+        (tensor[value][sel], (tensor["row"][sel], tensor["col"][sel])), shape=(n, n)
+    )
+    return (upper + upper.T).tocsr()
+
+
+def pair_year_matrix(tensor: dict, value: str = "weight"):
+    """
+    Pivots the tensor into a dense (pairs × years) matrix.
+    Returns (pairs, matrix) where `pairs` is a DataFrame with the columns
+    'pair_key', 'source_idx', 'target_idx', 'source', 'target', aligned with the rows.
+    """
+    keys = pack_pair_key(tensor["row"], tensor["col"])
+    uniq, pair_pos = np.unique(keys, return_inverse=True)
+    matrix = np.zeros((len(uniq), len(tensor["years"])), dtype=np.float64)
+    np.add.at(matrix, (pair_pos, tensor["year_pos"]), tensor[value])
+
+    src, tgt = unpack_pair_key(uniq)
+    pairs = pd.DataFrame({
+        "pair_key": uniq,
+        "source_idx": src,
+        "target_idx": tgt,
+        "source": tensor["concepts"][src],
+        "target": tensor["concepts"][tgt],
+    })
+    return pairs, matrix
+
+
+def pair_trajectory(tensor: dict, a: str, b: str, value: str = "weight",
+                    cumulative: bool = False) -> pd.Series:
+    """
+    Yearly values (or their cumulative sum) of one concept pair, indexed by year.
+    Years without the pair are filled with 0.
+    """
+    concepts = tensor["concepts"]
+    idx = np.searchsorted(concepts, [a, b])
+    if (idx >= len(concepts)).any() or (concepts[np.minimum(idx, len(concepts) - 1)] != [a, b]).any():
+        raise KeyError(f"Unknown concept in pair ({a}, {b})")
+    i, j = sorted(idx)
+    sel = (tensor["row"] == i) & (tensor["col"] == j)
+    out = np.zeros(len(tensor["years"]))
+    np.add.at(out, tensor["year_pos"][sel], tensor[value][sel])
+    if cumulative:
+        out = np.cumsum(out)
+    return pd.Series(out, index=tensor["years"], name=value)
@@ -0,0 +1,182 @@
+from pathlib import Path
+import re
+import numpy as np
+import pandas as pd
+
+# Fixed log-spaced bins (10 per decade) so that chunks can be binned independently
+LOG_BINS = np.logspace(-2, 8, 101)
+
+
+def iter_edge_chunks(edge_dir: Path, chunksize: int = 200_000,
+                     columns=("pair_key", "weight", "citation_sum_year")):
+    """
+    Streams the yearly edge files in year order, `chunksize` rows at a time.
+    Yields (year, chunk) with only the requested columns.
+    """
+    pat = re.compile(r"edges_(\d{4})\.csv")
+    files = sorted((int(pat.search(f.name).group(1)), f) for f in Path(edge_dir).glob("edges_*.csv"))
+    for year, f in files:
+        for chunk in pd.read_csv(f, usecols=list(columns), chunksize=chunksize):
+            if not chunk.empty:
+                yield year, chunk
+
+
+class LinearFit:
+    """
+    Least squares y ~ a + X·b updated chunk by chunk from its sufficient
+    statistics (XᵀX, Xᵀy, yᵀy), so the data never has to fit in memory.
+    """
+
+    def __init__(self, n_features: int):
+        k = n_features + 1
+        self.xtx = np.zeros((k, k))
+        self.xty = np.zeros(k)
+        self.yty = 0.0
+        self.ysum = 0.0
+        self.n = 0
+
+    def update(self, X, y):
+        if len(y) == 0:
+            return
+        X = np.column_stack([np.ones(len(y)), np.asarray(X, dtype=float).reshape(len(y), -1)])
+        y = np.asarray(y, dtype=float)
+        self.xtx += X.T @ X
+        self.xty += X.T @ y
+        self.yty += y @ y
+        self.ysum += y.sum()
+        self.n += len(y)
+
+    def solve(self):
+        """
+        Returns (intercept, coefficients, R²).
+        """
+        beta = np.linalg.lstsq(self.xtx, self.xty, rcond=None)[0]
+        sse = self.yty - 2 * beta @ self.xty + beta @ self.xtx @ beta
+        sst = self.yty - self.ysum ** 2 / self.n
+        r2 = 1 - sse / sst if sst > 0 else np.nan
+        return beta[0], beta[1:], r2
+
+
+class GroupedMoments:
+    """
+    Count, mean and sum of squared deviations (M2) of a value per key, merged
+    across chunks with the parallel (Chan et al.) update, which stays accurate
+    for large, heavy-tailed values where raw power sums cancel.
+    """
+
+    def __init__(self):
+        self.table = None
+
+    def update(self, keys, values):
+        df = pd.DataFrame({"key": np.asarray(keys), "v": np.asarray(values, dtype=float)})
+        g = df.groupby("key")["v"]
+        part = pd.DataFrame({"n": g.count().astype(float), "mean": g.mean()})
+        dev = df["v"].to_numpy() - part["mean"].reindex(df["key"]).to_numpy()
+        part["m2"] = pd.Series(dev ** 2).groupby(df["key"].to_numpy()).sum()
+        if self.table is None:
+            self.table = part
+            return
+        a, b = self.table.align(part, join="outer", fill_value=0.0)
+        n = a["n"] + b["n"]
+        delta = b["mean"] - a["mean"]
+        self.table = pd.DataFrame({
+            "n": n,
+            "mean": a["mean"] + delta * b["n"] / n,
+            "m2": a["m2"] + b["m2"] + delta ** 2 * a["n"] * b["n"] / n,
+        })
+
+    def mean(self) -> pd.Series:
+        return self.table["mean"]
+
+    def var(self) -> pd.Series:
+        """Sample variance (ddof=1), NaN for keys seen once."""
+        t = self.table
+        return (t["m2"] / (t["n"] - 1)).where(t["n"] > 1)
+
+
+def collect_edge_stats(edge_dir: Path, chunksize: int = 200_000) -> dict:
+    """
+    One streaming pass over all the yearly edge files. Returns:
+        - n_rows, n_pairs
+        - hist_w_c, hist_w_cpp: 2-D histograms (LOG_BINS × LOG_BINS) of
+          weight vs citations and weight vs citations per paper
+        - hist_log, log_edges: 2-D histogram of (log10 weight, log10 citations),
+          values above the last edge counted in the last bin
+        - loglog: (slope, intercept, R²) of log10(citations) ~ log10(weight),
+          None without at least two positive (weight, citations) rows
+        - mean_cpp_by_weight: mean citations per paper for each weight
+        - citation_values: counts of each citation_sum_year value (for histograms)
+        - var_by_pair: variance of yearly citations per pair
+        - next_year: (intercept, coefficients, R², n) of the linear regression of the
+          next observed citations of a pair on (weight, citation_sum_year)
+    """
+    log_edges = np.linspace(-0.5, 6.5, 141)
+    hist_w_c = np.zeros((len(LOG_BINS) - 1,) * 2)
+    hist_w_cpp = np.zeros_like(hist_w_c)
+    hist_log = np.zeros((len(log_edges) - 1,) * 2)
+    loglog, next_year = LinearFit(1), LinearFit(2)
+    by_weight, by_pair = GroupedMoments(), GroupedMoments()
+    citation_values = pd.Series(dtype=float)
+
+    # last observation of each pair, only from the years already finished
+    last_seen = pd.DataFrame(columns=["weight", "citation_sum_year"], dtype=float)
+    current_year, current_rows, n_rows = None, [], 0
+
+    def close_year():
+        nonlocal last_seen
+        if current_rows:
+            done = pd.concat(current_rows).groupby("pair_key").last()
+            last_seen = pd.concat([last_seen[~last_seen.index.isin(done.index)], done])
+
+    for year, chunk in iter_edge_chunks(edge_dir, chunksize):
+        if year != current_year:
+            close_year()
+            current_year, current_rows = year, []
+
+        w = chunk["weight"].to_numpy(dtype=float)
+        c = chunk["citation_sum_year"].to_numpy(dtype=float)
+        n_rows += len(chunk)
+
+        hist_w_c += np.histogram2d(w, c, bins=[LOG_BINS, LOG_BINS])[0]
+        cpp = np.where(w > 0, c / np.where(w > 0, w, 1), np.nan)
+        hist_w_cpp += np.histogram2d(w, cpp, bins=[LOG_BINS, LOG_BINS])[0]
+
+        pos = (w > 0) & (c > 0)
+        lw, lc = np.log10(w[pos]), np.log10(c[pos])
+        loglog.update(lw, lc)
+        # the fit uses the exact values, the histogram clips them into its range
+        top = log_edges[-1]
+        hist_log += np.histogram2d(np.minimum(lw, top), np.minimum(lc, top), bins=[log_edges, log_edges])[0]
+
+        ok = w > 0
+        by_weight.update(w[ok], cpp[ok])
+        by_pair.update(chunk["pair_key"], c)
+        citation_values = citation_values.add(pd.Series(c).value_counts(), fill_value=0)
+
+        # next observed citations: pair seen in an earlier year -> this year's value
+        prev = last_seen.reindex(chunk["pair_key"].to_numpy())
+        has_prev = prev["weight"].notna().to_numpy()
+        if has_prev.any():
+            next_year.update(prev.loc[has_prev, ["weight", "citation_sum_year"]].to_numpy(), c[has_prev])
+        current_rows.append(chunk.set_index("pair_key")[["weight", "citation_sum_year"]].astype(float))
+
+    close_year()
+
+    slope_fit = None
+    if loglog.n > 1:
+        intercept, (slope,), r2 = loglog.solve()
+        slope_fit = (slope, intercept, r2)
+
+    return {
+        "n_rows": n_rows,
+        "n_pairs": len(by_pair.table) if by_pair.table is not None else 0,
+        "hist_w_c": hist_w_c,
+        "hist_w_cpp": hist_w_cpp,
+        "hist_log": hist_log,
+        "log_edges": log_edges,
+        "loglog": slope_fit,
+        "mean_cpp_by_weight": by_weight.mean().sort_index(),
+        "citation_values": citation_values.sort_index(),
+        "var_by_pair": by_pair.var().dropna(),
+        "next_year": next_year.solve() + (next_year.n,) if next_year.n > 2 else (None, None, None, next_year.n),
+    }
@@ -0,0 +1,197 @@
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+import pickle
+
+# Batch rendering never opens a window: force the non-interactive backend
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+import numpy as np
+
+MANIFEST_NAME = ".render_manifest.json"
+
+
+# -------------------------------------------------------------------
+# Plot kinds. A job only carries plain data, the drawing code lives here
+# so that worker processes can run it whatever the calling script is.
+# -------------------------------------------------------------------
+def _twin_axes(fig):
+    ax1 = fig.add_subplot(111)
+    return ax1, ax1.twinx()
+
+
+def _reset_twin_axes(axes):
+    ax1, ax2 = axes
+    ax1.cla()
+    ax2.cla()
+    # cla() puts the label of the twin axis back on the left
+    ax2.yaxis.set_label_position("right")
+
+
+def _draw_dual_axis(axes, d):
+    """
+    Two series sharing the x axis, one per y axis.
+    d = {"x", "xlabel", "title", "left": {...}, "right": {...}} where each side has
+    "y", "color", "label" and optionally "marker", "linestyle", "ylim".
+    """
+    for ax, side in zip(axes, (d["left"], d["right"])):
+        ax.plot(d["x"], side["y"], marker=side.get("marker", "o"),
+                linestyle=side.get("linestyle", "-"), color=side["color"])
+        if side.get("ylim") is not None:
+            ax.set_ylim(*side["ylim"])
+        ax.set_ylabel(side["label"], color=side["color"])
+        ax.tick_params(axis="y", labelcolor=side["color"])
+    axes[0].set_xlabel(d["xlabel"])
+    axes[0].set_title(d["title"])
+
+
+def _single_axes(fig):
+    return (fig.add_subplot(111),)
+
+
+def _reset_single_axes(axes):
+    axes[0].cla()
+
+
+def _decorate(ax, d):
+    ax.set_xscale(d.get("xscale", "linear"))
+    ax.set_yscale(d.get("yscale", "linear"))
+    ax.set_xlabel(d.get("xlabel", ""))
+    ax.set_ylabel(d.get("ylabel", ""))
+    ax.set_title(d.get("title", ""))
+
+
+def _draw_heatmap(axes, d):
+    """
+    Pre-binned 2-D histogram (stands in for a scatter plot of many points).
+    d = {"xedges", "yedges", "counts"} plus axis options and an optional
+    overlay "line": {"x", "y", "label", "color"}.
+    """
+    ax = axes[0]
+    raw = np.asarray(d["counts"])
+    counts = np.ma.masked_equal(raw.T, 0)
+    if counts.count():
+        ax.pcolormesh(d["xedges"], d["yedges"], counts, norm=LogNorm(), cmap="Blues")
+    line = d.get("line")
+    if line is not None:
+        ax.plot(line["x"], line["y"], color=line.get("color", "red"), label=line.get("label"))
+        ax.legend()
+    _decorate(ax, d)
+    # zoom on the non-empty bins (the bins are fixed and much wider than the data)
+    if counts.count():
+        xs, ys = np.nonzero(raw.sum(axis=1))[0], np.nonzero(raw.sum(axis=0))[0]
+        ax.set_xlim(d["xedges"][xs[0]], d["xedges"][xs[-1] + 1])
+        ax.set_ylim(d["yedges"][ys[0]], d["yedges"][ys[-1] + 1])
+
+
+def _draw_line(axes, d):
+    """
+    d = {"x", "y"} plus axis options and "marker".
+    """
+    ax = axes[0]
+    ax.plot(d["x"], d["y"], marker=d.get("marker", "."))
+    _decorate(ax, d)
+
+
+def _draw_hist(axes, d):
+    """
+    Pre-binned histogram. d = {"edges", "counts"} plus axis options.
+    """
+    ax = axes[0]
+    ax.stairs(d["counts"], d["edges"], fill=True)
+    _decorate(ax, d)
+
+
+# kind -> (create axes on a new figure, reset them for the next job, draw)
+PLOT_KINDS = {
+    "dual_axis": (_twin_axes, _reset_twin_axes, _draw_dual_axis),
+    "heatmap": (_single_axes, _reset_single_axes, _draw_heatmap),
+    "line": (_single_axes, _reset_single_axes, _draw_line),
+    "hist": (_single_axes, _reset_single_axes, _draw_hist),
+}
+
+
+# -------------------------------------------------------------------
+# Worker side: one figure (and its axes) per kind and size, reused between jobs
+# -------------------------------------------------------------------
+_FIGURES = {}
+
+
+def _render_one(job: dict) -> str:
+    create, reset, draw = PLOT_KINDS[job["kind"]]
+    figsize = tuple(job.get("figsize", (10, 4)))
+    key = (job["kind"], figsize)
+    if key in _FIGURES:
+        fig, axes = _FIGURES[key]
+        reset(axes)
+    else:
+        fig = plt.figure(figsize=figsize)
+        axes = create(fig)
+        _FIGURES[key] = (fig, axes)
+
+    draw(axes, job["data"])
+    fig.tight_layout()
+    fig.savefig(job["path"], dpi=job.get("dpi", 150))
+    return str(job["path"])
+
+
+# -------------------------------------------------------------------
+# Caller side
+# -------------------------------------------------------------------
+def job_hash(job: dict) -> str:
+    """
+    Hash of everything that changes the image: kind, size, dpi and input data.
+    """
+    payload = (job["kind"], tuple(job.get("figsize", (10, 4))), job.get("dpi", 150), job["data"])
+    return hashlib.sha1(pickle.dumps(payload, protocol=4)).hexdigest()
+
+
+def _load_manifest(folder: Path) -> dict:
+    path = folder / MANIFEST_NAME
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def render_figures(jobs: list, processes: int = None, force: bool = False) -> int:
+    """
+    Renders a batch of figure jobs and returns how many images were (re)drawn.
+    Each job is a dict {"kind", "data", "path"} (optionally "figsize", "dpi").
+    Images whose input hash matches the manifest of their folder are skipped,
+    unless `force` is set. The remaining jobs are spread over `processes`
+    worker processes (default: all CPUs, 1 renders in the current process).
+    """
+    manifests, todo = {}, []
+    for job in jobs:
+        path = Path(job["path"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.parent not in manifests:
+            manifests[path.parent] = _load_manifest(path.parent)
+        digest = job_hash(job)
+        if not force and path.exists() and manifests[path.parent].get(path.name) == digest:
+            continue
+        manifests[path.parent][path.name] = digest
+        todo.append(job)
+
+    if not todo:
+        return 0
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(todo) == 1:
+        for job in todo:
+            _render_one(job)
+    else:
+        # large chunks keep each worker on the same reused figures
+        chunk = max(1, len(todo) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            list(pool.map(_render_one, todo, chunksize=chunk))
+
+    for folder, manifest in manifests.items():
+        with open(folder / MANIFEST_NAME, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+    return len(todo)
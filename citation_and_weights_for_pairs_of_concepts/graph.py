@@ -1,11 +1,9 @@
 from pathlib import Path
-import os, itertools, collections
-import re
-import matplotlib.pyplot as plt
+import os
 import numpy as np
-from scipy.stats import linregress
-from sklearn.linear_model import LinearRegression
-import pandas as pd
+
+from edge_stats import LOG_BINS, collect_edge_stats
+from figure_renderer import render_figures
 
 # Directory for storing results
 root = r"C:/results/"
@@ -16,118 +14,90 @@ FIG_DIR = Path(DIG_DIR, "graphs")
 EDGE_DIR.mkdir(parents=True, exist_ok=True)
 FIG_DIR.mkdir(parents=True, exist_ok=True)
 
-# 1. LOAD DATA ----------------------------------------
-
-rows = []
-pat = re.compile(r"edges_(\d{4})\.csv")
-for f in EDGE_DIR.glob("edges_*.csv"):
-    year = int(pat.search(f.name).group(1))
-    df = pd.read_csv(f)
-    if df.empty:
-        continue
-    df["year"] = year
-    df["pair"] = df.apply(lambda r: tuple(sorted((r["source"], r["target"]))), axis=1)
-    rows.append(df[["pair", "year", "weight", "citation_sum_year"]])
-big = pd.concat(rows, ignore_index=True)
-
-print(f"Loaded {len(big):,} rows for {big['pair'].nunique():,} unique pairs.")
-
-# 2. RELATIONSHIP: WEIGHT vs CITATIONS -----------------
-
-plt.figure(figsize=(6, 5))
-plt.scatter(big["weight"], big["citation_sum_year"], alpha=0.2)
-plt.xscale("log")
-plt.yscale("log")
-plt.xlabel("Weight (number of papers, log)")
-plt.ylabel("Citations (log)")
-plt.title("Weight vs. Citations per pair per year")
-plt.tight_layout()
-plt.savefig(FIG_DIR / "weight_vs_citations.png", dpi=150)
-plt.close()
-
-# 2b. LOG-LOG REGRESSION
-mask = (big["weight"] > 0) & (big["citation_sum_year"] > 0)
-x = np.log10(big.loc[mask, "weight"])
-y = np.log10(big.loc[mask, "citation_sum_year"])
-slope, intercept, r_value, p_value, std_err = linregress(x, y)
-print(f"log-log slope: {slope:.2f}, intercept: {intercept:.2f}, R^2: {r_value**2:.2f}")
-
-plt.figure(figsize=(6, 5))
-plt.scatter(x, y, alpha=0.2, label="data")
-plt.plot(x, slope*x + intercept, color="red", label=f"y={slope:.2f}x+{intercept:.2f}")
-plt.xlabel("log10(Weight)")
-plt.ylabel("log10(Citations)")
-plt.title("Log-Log Regression: Citations vs Weight")
-plt.legend()
-plt.tight_layout()
-plt.savefig(FIG_DIR / "loglog_regression.png", dpi=150)
-plt.close()
-
-# 3. CRITICAL MASS: CITATIONS PER PAPER -------------------
-
-big["citations_per_paper"] = np.where(big["weight"]>0, big["citation_sum_year"]/big["weight"], np.nan)
-
-plt.figure(figsize=(6, 5))
-plt.scatter(big["weight"], big["citations_per_paper"], alpha=0.2)
-plt.xscale("log")
-plt.yscale("log")
-plt.xlabel("Weight (number of papers, log)")
-plt.ylabel("Citations per paper (log)")
-plt.title("Citations per paper vs Weight")
-plt.tight_layout()
-plt.savefig(FIG_DIR / "citation_per_paper.png", dpi=150)
-plt.close()
-
-# Optionally, plot a rolling mean to see threshold effects
-weights_sorted = np.sort(big["weight"].unique())
-means = [big[big["weight"]==w]["citations_per_paper"].mean() for w in weights_sorted]
-plt.figure(figsize=(6, 5))
-plt.plot(weights_sorted, means, marker=".")
-plt.xscale("log")
-plt.yscale("log")
-plt.xlabel("Weight")
-plt.ylabel("Avg Citations per paper")
-plt.title("Mean Citations per paper vs Weight")
-plt.tight_layout()
-plt.savefig(FIG_DIR / "mean_citations.png", dpi=150)
-plt.close()
-
-# 4. DISTRIBUTION AND VARIANCE --------------------------
-
-plt.figure(figsize=(6, 5))
-plt.hist(big["citation_sum_year"], bins=100, log=True)
-plt.xlabel("Citations per pair-year")
-plt.ylabel("Frequency (log)")
-plt.title("Distribution of Citations per Pair-Year")
-plt.tight_layout()
-plt.savefig(FIG_DIR / "distribution_of_citations.png", dpi=150)
-plt.close()
-
-var_by_pair = big.groupby("pair")["citation_sum_year"].var().dropna()
-plt.figure(figsize=(6, 5))
-plt.hist(var_by_pair, bins=50, log=True)
-plt.xlabel("Variance of yearly citations per pair")
-plt.ylabel("Number of pairs (log)")
-plt.title("Variance of yearly citations across pairs")
-plt.tight_layout()
-plt.savefig(FIG_DIR / "variance_yearly_citations.png", dpi=150)
-plt.close()
-
-# 5. PREDICT NEXT-YEAR CITATIONS ------------------------
-
-# Prepare data: predict next year's citations from current year's values
-big = big.sort_values(["pair", "year"])
-big["next_citations"] = big.groupby("pair")["citation_sum_year"].shift(-1)
-train = big.dropna(subset=["next_citations", "weight", "citation_sum_year"])
-
-X = train[["weight", "citation_sum_year"]].values
-y = train["next_citations"].values
-
-if len(train) > 100:
-    model = LinearRegression().fit(X, y)
-    print("\nLinear Regression to predict next-year citation_sum_year:")
-    print("R^2:", model.score(X, y))
-    print("Intercept:", model.intercept_)
-    print("Coefficients: (weight, citation_sum_year)", model.coef_)
-else:
-    print("Not enough data for regression.")
+
+def figure(kind, name, **data):
+    return {"kind": kind, "path": FIG_DIR / name, "figsize": (6, 5), "data": data}
+
+
+if __name__ == "__main__":
+
+    # 1. LOAD DATA ----------------------------------------
+    # One streaming pass over the edge files: only binned and grouped
+    # aggregates are kept in memory, never the full pair-year table.
+
+    stats = collect_edge_stats(EDGE_DIR)
+    print(f"Loaded {stats['n_rows']:,} rows for {stats['n_pairs']:,} unique pairs.")
+    jobs = []
+
+    # 2. RELATIONSHIP: WEIGHT vs CITATIONS -----------------
+
+    jobs.append(figure("heatmap", "weight_vs_citations.png",
+                       xedges=LOG_BINS, yedges=LOG_BINS, counts=stats["hist_w_c"],
+                       xscale="log", yscale="log",
+                       xlabel="Weight (number of papers, log)", ylabel="Citations (log)",
+                       title="Weight vs. Citations per pair per year"))
+
+    # 2b. LOG-LOG REGRESSION
+    if stats["loglog"] is None:
+        print("No positive weight/citation pairs: log-log regression skipped.")
+    else:
+        slope, intercept, r2 = stats["loglog"]
+        print(f"log-log slope: {slope:.2f}, intercept: {intercept:.2f}, R^2: {r2:.2f}")
+
+        edges = stats["log_edges"]
+        filled = np.nonzero(stats["hist_log"].sum(axis=1))[0]
+        x = edges[[filled[0], filled[-1] + 1]]
+        jobs.append(figure("heatmap", "loglog_regression.png",
+                           xedges=edges, yedges=edges, counts=stats["hist_log"],
+                           line={"x": x, "y": slope*x + intercept,
+                                 "label": f"y={slope:.2f}x+{intercept:.2f}"},
+                           xlabel="log10(Weight)", ylabel="log10(Citations)",
+                           title="Log-Log Regression: Citations vs Weight"))
+
+    # 3. CRITICAL MASS: CITATIONS PER PAPER -------------------
+
+    jobs.append(figure("heatmap", "citation_per_paper.png",
+                       xedges=LOG_BINS, yedges=LOG_BINS, counts=stats["hist_w_cpp"],
+                       xscale="log", yscale="log",
+                       xlabel="Weight (number of papers, log)", ylabel="Citations per paper (log)",
+                       title="Citations per paper vs Weight"))
+
+    # Mean citations per paper for every weight (one grouped pass)
+    means = stats["mean_cpp_by_weight"]
+    jobs.append(figure("line", "mean_citations.png",
+                       x=means.index.to_numpy(), y=means.to_numpy(),
+                       xscale="log", yscale="log",
+                       xlabel="Weight", ylabel="Avg Citations per paper",
+                       title="Mean Citations per paper vs Weight"))
+
+    # 4. DISTRIBUTION AND VARIANCE --------------------------
+
+    values = stats["citation_values"]
+    counts, bins = np.histogram(values.index.to_numpy(), bins=100, weights=values.to_numpy())
+    jobs.append(figure("hist", "distribution_of_citations.png",
+                       edges=bins, counts=counts, yscale="log",
+                       xlabel="Citations per pair-year", ylabel="Frequency (log)",
+                       title="Distribution of Citations per Pair-Year"))
+
+    counts, bins = np.histogram(stats["var_by_pair"], bins=50)
+    jobs.append(figure("hist", "variance_yearly_citations.png",
+                       edges=bins, counts=counts, yscale="log",
+                       xlabel="Variance of yearly citations per pair", ylabel="Number of pairs (log)",
+                       title="Variance of yearly citations across pairs"))
+
+    render_figures(jobs)
+
+    # 5. PREDICT NEXT-YEAR CITATIONS ------------------------
+
+    # Predict a pair's next observed citations from its current (weight, citations),
+    # fitted from the streamed sufficient statistics. This is the baseline, the
+    # model with multi-year history is in citation_predictor.py
+    intercept, coef, r2, n = stats["next_year"]
+
+    if n > 100:
+        print("\nLinear Regression to predict next-year citation_sum_year:")
+        print("R^2:", r2)
+        print("Intercept:", intercept)
+        print("Coefficients: (weight, citation_sum_year)", coef)
+    else:
+        print("Not enough data for regression.")
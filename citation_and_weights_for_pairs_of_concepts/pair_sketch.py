@@ -0,0 +1,255 @@
+from pathlib import Path
+import math
+import numpy as np
+import pandas as pd
+
+from analysis import DEFAULT_CITATION_WINDOWS, window_citations
+
+# Approximate co-occurrence weights for corpora too large for the exact path
+ROOT = r"C:/results/"
+SKETCH_DIR = Path(ROOT, "sketch")
+EDGE_DIR = Path(ROOT, "raw_graph1")
+
+
+# -------------------------------------------------------------------
+# Count-min sketch
+# -------------------------------------------------------------------
+class CountMinSketch:
+    """
+    Count-min sketch over int64 keys holding several value columns (here: weight
+    and one column per citation window). All columns share the same `depth` hash
+    rows, so a key is hashed once per update.
+
+    With width w = 2^ceil(log2(e / eps)) and depth d = ceil(ln(1 / delta)), for
+    non-negative updates the estimate of every key and column satisfies
+        true <= estimate <= true + eps * N      with probability >= 1 - delta
+    where N is the total mass added to that column. Memory is
+    n_columns × d × w floats whatever the number of distinct keys.
+    """
+
+    def __init__(self, eps: float = 1e-4, delta: float = 0.01, n_columns: int = 1, seed: int = 0):
+        self.bits = max(1, math.ceil(math.log2(math.e / eps)))
+        self.width = 1 << self.bits
+        self.depth = max(1, math.ceil(math.log(1 / delta)))
+        self.eps, self.delta = eps, delta
+        rng = np.random.default_rng(seed)
+        # multiply-shift hashing: h(x) = (a*x + b mod 2^64) >> (64 - bits), a odd
+        self.a = rng.integers(1, 2**63, size=self.depth, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2**63, size=self.depth, dtype=np.uint64)
+        self.table = np.zeros((n_columns, self.depth, self.width))
+        self.total = np.zeros(n_columns)
+
+    def _buckets(self, keys) -> np.ndarray:
+        x = np.asarray(keys, dtype=np.int64).view(np.uint64)
+        with np.errstate(over="ignore"):
+            h = self.a[:, None] * x[None, :] + self.b[:, None]
+        return (h >> np.uint64(64 - self.bits)).astype(np.intp)  # depth × n
+
+    def update(self, keys, values):
+        """
+        Adds `values` (n, or n × n_columns, non-negative) to `keys`.
+        """
+        values = np.asarray(values, dtype=float).reshape(len(keys), -1)
+        buckets = self._buckets(keys)
+        for c in range(self.table.shape[0]):
+            for r in range(self.depth):
+                self.table[c, r] += np.bincount(buckets[r], weights=values[:, c], minlength=self.width)
+        self.total += values.sum(axis=0)
+
+    def query(self, keys) -> np.ndarray:
+        """
+        Estimates for `keys`, shape (n, n_columns).
+        """
+        buckets = self._buckets(keys)
+        rows = np.arange(self.depth)[:, None]
+        return np.stack([self.table[c][rows, buckets].min(axis=0)
+                         for c in range(self.table.shape[0])], axis=1)
+
+    def error_bound(self) -> np.ndarray:
+        """
+        Additive error eps * N of each column (holds with probability 1 - delta).
+        """
+        return self.eps * self.total
+
+
+class HeavyHitters:
+    """
+    Candidate set of the `capacity` keys with the largest estimated first column.
+    After each batch the candidates and the batch keys are re-ranked from the
+    sketch: the sketch has seen every update, so a key evicted earlier comes
+    back with its full estimate as soon as it appears again.
+    """
+
+    def __init__(self, sketch: CountMinSketch, capacity: int = 1000):
+        self.sketch = sketch
+        self.capacity = capacity
+        self.keys = np.zeros(0, dtype=np.int64)
+
+    def update(self, keys, values):
+        self.sketch.update(keys, values)
+        cand = np.union1d(self.keys, keys)
+        if len(cand) > self.capacity:
+            est = self.sketch.query(cand)[:, 0]
+            cand = cand[np.argpartition(-est, self.capacity - 1)[:self.capacity]]
+        self.keys = cand
+
+    def top(self):
+        """
+        Returns (keys, estimates) sorted by decreasing estimated first column.
+        """
+        est = self.sketch.query(self.keys)
+        order = np.argsort(-est[:, 0], kind="stable")
+        return self.keys[order], est[order]
+
+
+# -------------------------------------------------------------------
+# Paper stream -> concept-pair stream
+# -------------------------------------------------------------------
+def iter_paper_pairs(papers_csv, levels_csv, level_threshold: int = 4,
+                     windows: dict = None, years=(2013, 2025), chunksize: int = 50_000):
+    """
+    Reads the papers CSV in chunks and yields (year, pair_names, pair_keys, values)
+    with one row per concept pair and year in the chunk: values[:, 0] is the
+    number of papers of the chunk with both concepts, the next columns their
+    citations in each window. Filtering and concept name cleaning are the same
+    as in analysis11_with_citations. Concept indices are assigned on the fly
+    (memory grows with the number of concepts, not of pairs); `pair_names`
+    maps each concept index to its cleaned name.
+    """
+    windows = dict(windows or DEFAULT_CITATION_WINDOWS)
+    levels = pd.read_csv(levels_csv)
+    allowed_ids = set(levels.loc[levels["level"] >= level_threshold, "concept_id"])
+    names, index = [], {}
+
+    for chunk in pd.read_csv(papers_csv, chunksize=chunksize):
+        chunk = chunk[(chunk.publication_year >= years[0]) & (chunk.publication_year < years[1])]
+        chunk = chunk.drop_duplicates("paper_id", keep="last").reset_index(drop=True)
+        if chunk.empty:
+            continue
+        cite_cols = sorted((int(c.replace("cited_by_", "")), c) for c in chunk.columns if c.startswith("cited_by_"))
+        cite_years = np.array([y for y, _ in cite_cols])
+        counts = chunk[[c for _, c in cite_cols]].fillna(0).to_numpy(dtype=float)
+        prefix = np.hstack([np.zeros((len(chunk), 1)), np.cumsum(counts, axis=1)])
+
+        # one row per (paper, concept)
+        long = chunk["concepts"].str.split(";").explode().str.split("|", expand=True)
+        long.columns = ["concept_id", "concept", "score"]
+        long["row"] = long.index
+        long = long[(long["score"].astype(float) > 0) & long["concept_id"].isin(allowed_ids)]
+        long["concept"] = (long["concept"].str.strip().str.lower()
+                           .str.replace(r'\s+', '_', regex=True))
+        for name in long["concept"].unique():
+            if name not in index:
+                index[name] = len(names)
+                names.append(name)
+        long["idx"] = long["concept"].map(index).astype(np.int64)
+        long = long[["row", "idx"]].drop_duplicates()
+
+        # all pairs of concepts inside each paper
+        pairs = long.merge(long, on="row")
+        pairs = pairs[pairs["idx_x"] < pairs["idx_y"]]
+        if pairs.empty:
+            continue
+        rows = pairs["row"].to_numpy()
+        pair_keys = (pairs["idx_x"].to_numpy() << 32) | pairs["idx_y"].to_numpy()
+        paper_years = chunk["publication_year"].to_numpy()[rows]
+
+        for year in np.unique(paper_years):
+            sel = paper_years == year
+            values = np.column_stack([np.ones(sel.sum()),
+                                      window_citations(prefix, cite_years, rows[sel], year, windows)])
+            keys, inv = np.unique(pair_keys[sel], return_inverse=True)
+            summed = np.zeros((len(keys), values.shape[1]))
+            np.add.at(summed, inv, values)
+            yield int(year), names, keys, summed
+
+
+# -------------------------------------------------------------------
+# Approximate yearly top pairs
+# -------------------------------------------------------------------
+def sketch_top_pairs(papers_csv="quantum_networks_papers_cites.csv",
+                     levels_csv="concepts_levels.csv", level_threshold: int = 4,
+                     windows: dict = None, k: int = 1000, eps: float = 1e-4,
+                     delta: float = 0.01, chunksize: int = 50_000, seed: int = 0,
+                     out_dir: Path = SKETCH_DIR) -> dict:
+    """
+    Approximate counterpart of analysis11_with_citations for whole-field corpora.
+    Streams the papers once, feeds the concept pairs of each year into a count-min
+    sketch (weight + one column per citation window) and tracks the `k` pairs with
+    the largest estimated weight. Memory per year is O(k + width × depth) instead
+    of one entry per pair.
+    Writes C:/results/sketch/top_pairs_{year}.csv with the columns source, target,
+    weight and the window names (estimates, never below the true value) plus
+    weight_bound, the additive error eps × N of the weight column.
+    Returns {year: DataFrame}.
+    """
+    windows = dict(windows or DEFAULT_CITATION_WINDOWS)
+    trackers, names = {}, []
+
+    for year, names, keys, values in iter_paper_pairs(papers_csv, levels_csv, level_threshold,
+                                                     windows, chunksize=chunksize):
+        if year not in trackers:
+            sketch = CountMinSketch(eps, delta, n_columns=values.shape[1], seed=seed)
+            trackers[year] = HeavyHitters(sketch, capacity=k)
+        trackers[year].update(keys, values)
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    names = np.asarray(names)
+    result = {}
+    for year in sorted(trackers):
+        keys, est = trackers[year].top()
+        a, b = names[keys >> 32], names[keys & 0xFFFFFFFF]
+        # same orientation as the exact edge files (source < target by name)
+        swap = a > b
+        top = pd.DataFrame({"source": np.where(swap, b, a), "target": np.where(swap, a, b)})
+        for c, name in enumerate(["weight", *windows]):
+            top[name] = est[:, c]
+        bounds = trackers[year].sketch.error_bound()
+        top["weight_bound"] = bounds[0]
+        top.to_csv(out_dir / f"top_pairs_{year}.csv", index=False)
+        result[year] = top
+        print(f"✔ {year}: top {len(top):,} pairs, weight error ≤ {bounds[0]:.1f} (p ≥ {1 - delta:.2f})")
+    return result
+
+
+def compare_with_exact(result: dict, edge_dir: Path = EDGE_DIR, k: int = 100) -> pd.DataFrame:
+    """
+    Checks sketch estimates against the exact edge files (edges_{year}.csv).
+    Per year: recall of the exact top-k pairs by weight (`k` column: k capped by
+    the number of exact and sketched pairs of the year), largest weight error of
+    the sketched pairs found in the exact file, the bound eps × N and the share of
+    pairs within it (expected ≥ 1 - delta), and whether any estimate is below the
+    exact value (never expected).
+    """
+    rows = []
+    for year, top in sorted(result.items()):
+        path = Path(edge_dir) / f"edges_{year}.csv"
+        if not path.exists():
+            continue
+        exact = pd.read_csv(path, usecols=["source", "target", "weight"])
+        merged = top.merge(exact, on=["source", "target"], suffixes=("", "_exact"))
+        err = merged["weight"] - merged["weight_exact"]
+        bound = top["weight_bound"].iloc[0] if len(top) else 0.0
+
+        kk = min(k, len(exact), len(top))
+        exact_top = exact.nlargest(kk, "weight", keep="all")
+        # ties at the cutoff: any pair with the k-th weight counts as a hit
+        cutoff = exact_top["weight"].min() if kk else np.inf
+        found = top.head(kk).merge(exact[exact["weight"] >= cutoff], on=["source", "target"])
+        rows.append({
+            "year": year,
+            "k": kk,
+            "recall": len(found) / kk if kk else np.nan,
+            "n_compared": len(merged),
+            "max_error": err.max() if len(err) else 0.0,
+            "bound": bound,
+            "within_bound": (err <= bound).mean() if len(err) else np.nan,
+            "underestimates": int((err < -1e-9).sum()),
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    result = sketch_top_pairs()
+    print(compare_with_exact(result).to_string(index=False))
@@ -1,10 +1,13 @@
 from pathlib import Path
 import os, re
 from typing import List, Tuple
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import random
 
+from concept_tensor import TENSOR_PATH, load_concept_tensor, pair_year_matrix
+from figure_renderer import render_figures
+
 root = r"C:/results/"
 os.makedirs(root, exist_ok=True)
 EDGE_DIR = Path(os.path.join(root,"raw_graph1"))
@@ -19,58 +22,52 @@ FIG_DIR.mkdir(parents=True, exist_ok=True)
 # -------------------------------------------------------------------
 # 1.  métriques pour chaque paire
 # -------------------------------------------------------------------
-def build_edge_metrics(edge_dir: Path) -> pd.DataFrame:
-    rows, pat = [], re.compile(r"edges_(\d{4})\.csv")
-    for f in edge_dir.glob("edges_*.csv"):
-        year = int(pat.search(f.name).group(1))
-        df = pd.read_csv(f)
-        if df.empty:
-            continue
-        df["pair"] = df.apply(
-            lambda r: tuple(sorted((r["source"], r["target"]))), axis=1)
-        # --- Fix duplicates: divide by 2 ---
-        df["weight"] = df["weight"] / 2
-        df["citation_sum_year"] = df["citation_sum_year"] / 2
-        # Optionally:
-        # df["citation_sum_year2"] = df["citation_sum_year2"] / 2
-        # -------------------------------
-        df["year"] = year
-        rows.append(df)
-
-    big = pd.concat(rows, ignore_index=True)
-
-    grouped = (big.groupby("pair")
-                 .agg(weight_total=("weight", "sum"),
-                      cites_total=("citation_sum_year", "sum"),
-                      year_first=("year", "min"),
-                      year_last=("year", "max"))
-                 .reset_index())
-
-    latest_year = big["year"].max()
-    latest = big[big["year"] == latest_year] \
-             .groupby("pair") \
-             .agg(weight_last=("weight", "sum"),
-                  cites_last=("citation_sum_year", "sum"))
-
-    grouped = grouped.merge(latest, on="pair", how="left")
-
-    Δ = 3
-    def last_n(s, n):
-        return s.sort_values().tail(n).sum()
-
-    tmp = (big.groupby("pair")
-             .agg(w_last3=("weight", lambda s: last_n(s, Δ)),
-                  w_prev3=("weight",
-                           lambda s: last_n(s.iloc[:-Δ] if len(s) > Δ else s*0, Δ)),
-                  c_last3=("citation_sum_year", lambda s: last_n(s, Δ)),
-                  c_prev3=("citation_sum_year",
-                           lambda s: last_n(s.iloc[:-Δ] if len(s) > Δ else s*0, Δ)))
-             .reset_index())
-
-    grouped = grouped.merge(tmp, on="pair", how="left")
-    grouped["weight_growth"] = (grouped["w_last3"]+1)/(grouped["w_prev3"]+1)
-    grouped["cites_growth"]  = (grouped["c_last3"]+1)/(grouped["c_prev3"]+1)
-    return grouped
+def load_pair_matrix(tensor_path: Path = TENSOR_PATH) -> dict:
+    """
+    Pivots the concept tensor once into dense (pairs × years) matrices.
+    Returns a dict with:
+        - pairs: DataFrame (pair_key, source, target, pair), one row per pair
+        - years: every year between the first and the last one, without gaps
+        - weight, cites: float arrays of shape (n_pairs, n_years)
+    """
+    tensor = load_concept_tensor(tensor_path)
+    pairs, weight = pair_year_matrix(tensor, "weight")
+    _, cites = pair_year_matrix(tensor, "citation_sum_year")
+    pairs["pair"] = list(zip(pairs["source"], pairs["target"]))
+
+    years = np.arange(tensor["years"].min(), tensor["years"].max() + 1)
+    cols = tensor["years"] - years[0]
+    W = np.zeros((len(pairs), len(years)))
+    C = np.zeros((len(pairs), len(years)))
+    W[:, cols], C[:, cols] = weight, cites
+    return {"pairs": pairs, "years": years, "weight": W, "cites": C}
+
+
+def build_edge_metrics(matrix: dict, delta: int = 3) -> pd.DataFrame:
+    W, C, years = matrix["weight"], matrix["cites"], matrix["years"]
+    T = len(years)
+    present = W > 0
+
+    m = matrix["pairs"][["pair_key", "source", "target", "pair"]].copy()
+    m["weight_total"] = W.sum(axis=1)
+    m["cites_total"] = C.sum(axis=1)
+    m["year_first"] = years[present.argmax(axis=1)]
+    m["year_last"] = years[T - 1 - present[:, ::-1].argmax(axis=1)]
+    m["weight_last"] = W[:, -1]
+    m["cites_last"] = C[:, -1]
+
+    # fenêtres glissantes : les `delta` dernières années vs les `delta` précédentes
+    cw = np.concatenate([np.zeros((len(W), 1)), W.cumsum(axis=1)], axis=1)
+    cc = np.concatenate([np.zeros((len(C), 1)), C.cumsum(axis=1)], axis=1)
+    a, b = max(T - delta, 0), max(T - 2 * delta, 0)
+    m["w_last3"] = cw[:, T] - cw[:, a]
+    m["w_prev3"] = cw[:, a] - cw[:, b]
+    m["c_last3"] = cc[:, T] - cc[:, a]
+    m["c_prev3"] = cc[:, a] - cc[:, b]
+
+    m["weight_growth"] = (m["w_last3"]+1)/(m["w_prev3"]+1)
+    m["cites_growth"]  = (m["c_last3"]+1)/(m["c_prev3"]+1)
+    return m
 
 
 # -------------------------------------------------------------------
@@ -111,119 +108,78 @@ def select_pairs(metrics: pd.DataFrame,
 # -------------------------------------------------------------------
 # 3.  visualisation (axes communs)
 # -------------------------------------------------------------------
-def visualise_pairs(pairs: List[Tuple[str, str]],
-                    edge_dir: Path,
-                    out_dir: Path,
-                    show: bool = False):
-
-    out_dir.mkdir(parents=True, exist_ok=True)
+def pair_figure_jobs(pairs: List[Tuple[str, str]],
+                     matrix: dict,
+                     out_dir: Path) -> list:
+    """
+    Figure jobs (yearly and cumulative) for the selected pairs, for figure_renderer.
+    """
+    if not pairs:
+        return []
 
-    rows, pat = [], re.compile(r"edges_(\d{4})\.csv")
-    for f in edge_dir.glob("edges_*.csv"):
-        year = int(pat.search(f.name).group(1))
-        df = pd.read_csv(f)
-        if df.empty:
-            continue
-        df["pair"] = df.apply(
-            lambda r: tuple(sorted((r["source"], r["target"]))), axis=1)
-        # --- Fix duplicates: divide by 2 ---
-        df["weight"] = df["weight"] / 2
-        df["citation_sum_year"] = df["citation_sum_year"] / 2
-        # Optionally:
-        # df["citation_sum_year2"] = df["citation_sum_year2"] / 2
-        # -------------------------------
-        df["year"] = year
-        rows.append(df)
-    big = pd.concat(rows, ignore_index=True)
-    all_years = range(big["year"].min(), big["year"].max()+1)
+    # lignes de la matrice (paires × années) des paires sélectionnées
+    row_of = {p: i for i, p in enumerate(matrix["pairs"]["pair"])}
+    rows = np.array([row_of[pair] for pair in pairs])
+    years = matrix["years"]
+    W, C = matrix["weight"][rows], matrix["cites"][rows]
+    W_cum, C_cum = W.cumsum(axis=1), C.cumsum(axis=1)
 
     # pré-calcul des limites
-    max_w = max_c = max_w_c = max_c_c = 0
-    prepared = {}
-    for pair in pairs:
-        dfp = (big[big["pair"] == pair]
-               .groupby("year", as_index=False)
-               .agg(weight=("weight", "sum"),
-                    citation_sum_year=("citation_sum_year", "sum"))) \
-            .set_index("year") \
-            .reindex(all_years, fill_value=0) \
-            .reset_index()
-
-        dfp["weight_cum"] = dfp["weight"].cumsum()
-        dfp["citation_sum_year"] = dfp["citation_sum_year"]  # per-year
-        dfp["citation_sum_cum"] = dfp["citation_sum_year"].cumsum()  # cumulative
-        prepared[pair] = dfp
-
-        max_w   = max(max_w,   dfp["weight"].max())
-        max_c   = max(max_c,   dfp["citation_sum_year"].max())
-        max_w_c = max(max_w_c, dfp["weight_cum"].max())
-        max_c_c = max(max_c_c, dfp["citation_sum_cum"].max())
-
-    for pair in pairs:
-        dfp = prepared[pair]
-        #print(dfp)
-        a, b = pair
+    max_w, max_w_c, max_c_c = W.max(), W_cum.max(), C_cum.max()
+
+    jobs = []
+    for k, (a, b) in enumerate(pairs):
         safe = re.sub(r"[^\w\-]+", "_", f"{a}__{b}")
 
         # --- normal -------------------------------------------------
-        fig, ax1 = plt.subplots(figsize=(10,4))
-        ax1.plot(dfp["year"], dfp["weight"], marker="o",
-                 color="steelblue", label="weight")
-        ax1.set_ylim(0, max_w*1.05)
-        ax1.set_ylabel("Nbr papiers", color="steelblue")
-        ax1.tick_params(axis='y', labelcolor="steelblue")
-
-        ax2 = ax1.twinx()
-        ax2.plot(dfp["year"], dfp["citation_sum_year"], marker="s",
-                 linestyle="--", color="darkorange")
-        ax2.set_ylim(0, dfp["citation_sum_year"].max() * 1.05)
-        ax2.set_ylabel("Citations (année)", color="darkorange")
-        ax2.tick_params(axis='y', labelcolor="darkorange")
-
-        ax1.set_xlabel("Année")
-        ax1.set_title(f"{a}  ↔  {b}")
-        fig.tight_layout()
-        fig.savefig(out_dir / f"{safe}.png", dpi=150)
-        if show: plt.show()
-        plt.close(fig)
+        jobs.append({"kind": "dual_axis", "path": out_dir / f"{safe}.png", "data": {
+            "x": years, "xlabel": "Année", "title": f"{a}  ↔  {b}",
+            "left": {"y": W[k], "color": "steelblue", "label": "Nbr papiers",
+                     "ylim": (0, max_w*1.05)},
+            "right": {"y": C[k], "color": "darkorange", "label": "Citations (année)",
+                      "marker": "s", "linestyle": "--", "ylim": (0, C[k].max()*1.05)},
+        }})
 
         # --- cumul --------------------------------------------------
-        fig, ax1 = plt.subplots(figsize=(10,4))
-        ax1.plot(dfp["year"], dfp["weight_cum"], marker="o",
-                 color="royalblue")
-        ax1.set_ylim(0, max_w_c*1.05)
-        ax1.set_ylabel("Papiers cum.", color="royalblue")
-        ax1.tick_params(axis='y', labelcolor="royalblue")
-
-        ax2 = ax1.twinx()
-        ax2.plot(dfp["year"], dfp["citation_sum_cum"], marker="s",
-                 linestyle="--", color="orangered")
-        ax2.set_ylim(0, max_c_c*1.05)
-        ax2.set_ylabel("Citations cum.", color="orangered")
-        ax2.tick_params(axis='y', labelcolor="orangered")
-
-        ax1.set_xlabel("Année")
-        ax1.set_title(f"{a}  ↔  {b}  –  cumul")
-        fig.tight_layout()
-        fig.savefig(out_dir / f"{safe}_cumulative.png", dpi=150)
-        if show: plt.show()
-        plt.close(fig)
+        jobs.append({"kind": "dual_axis", "path": out_dir / f"{safe}_cumulative.png", "data": {
+            "x": years, "xlabel": "Année", "title": f"{a}  ↔  {b}  –  cumul",
+            "left": {"y": W_cum[k], "color": "royalblue", "label": "Papiers cum.",
+                     "ylim": (0, max_w_c*1.05)},
+            "right": {"y": C_cum[k], "color": "orangered", "label": "Citations cum.",
+                      "marker": "s", "linestyle": "--", "ylim": (0, max_c_c*1.05)},
+        }})
+    return jobs
+
+
+def visualise_pairs(pairs: List[Tuple[str, str]],
+                    matrix: dict,
+                    out_dir: Path,
+                    processes: int = None):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return render_figures(pair_figure_jobs(pairs, matrix, out_dir), processes=processes)
 
 
 # -------------------------------------------------------------------
 # 4.  exécuter tous les classements dans des dossiers séparés
 # -------------------------------------------------------------------
-def run_all_rankings(k: int = 5, seed: int = 42):
-    metrics = build_edge_metrics(EDGE_DIR)
+def run_all_rankings(k: int = 5, seed: int = 42, processes: int = None):
+    matrix = load_pair_matrix(TENSOR_PATH)
+    metrics = build_edge_metrics(matrix)
     modes = ["cites_total", "cites_last", "cites_growth",
              "weight_total", "weight_growth", "newcomer"]
 
+    # toutes les figures des six classements sont rendues en un seul lot
+    jobs = []
     for mode in modes:
         pairs = select_pairs(metrics, mode, k=k, seed=seed)
         out_dir = FIG_DIR / mode
-        visualise_pairs(pairs, EDGE_DIR, out_dir, show=False)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        jobs += pair_figure_jobs(pairs, matrix, out_dir)
         print(f"➡️  {mode}: {len(pairs)} paires sauvegardées dans {out_dir}")
 
+    n = render_figures(jobs, processes=processes)
+    print(f"🖼️  {n} figures rendues, {len(jobs) - n} inchangées")
+
 # lancez-le :
 def list_all_newcomer_pairs(metrics: pd.DataFrame, threshold_year: int = 2017) -> List[Tuple[str, str]]:
     """
@@ -233,7 +189,7 @@ def list_all_newcomer_pairs(metrics: pd.DataFrame, threshold_year: int = 2017) -
     return newcomers["pair"].tolist()
 
 # Utilisation :
-#metrics = build_edge_metrics(EDGE_DIR)
+#metrics = build_edge_metrics(load_pair_matrix(TENSOR_PATH))
 #newcomer_pairs = list_all_newcomer_pairs(metrics, threshold_year=2017)
 #print(f"{len(newcomer_pairs)} paires newcomers trouvées (year_first >= 2017) :")
 #for pair in newcomer_pairs:
@@ -242,4 +198,5 @@ def list_all_newcomer_pairs(metrics: pd.DataFrame, threshold_year: int = 2017) -
     #for a, b in newcomer_pairs:
         #f.write(f"{a}\t{b}\n")
 
-run_all_rankings(k=10, seed=123)
\ No newline at end of file
+if __name__ == "__main__":
+    run_all_rankings(k=10, seed=123)
@@ -0,0 +1,115 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from citation_graph import adjacency, load_citation_graph, publication_years, work_id
+from concept_pairs import concept_incidence, load_papers
+
+KINDS = ('cocitation', 'coupling')
+
+
+def graph_incidence(graph: dict, papers: pd.DataFrame):
+    """
+    Work × concept incidence matrix aligned with graph["ids"]: works that are not
+    in `papers` (e.g. references outside the pool) get an empty row.
+    Returns (P, concept_ids).
+    """
+    P, concept_ids = concept_incidence(papers)
+    row_of = pd.Series(np.arange(len(papers)), index=papers['paper_id'].map(work_id))
+    row_of = row_of[~row_of.index.duplicated(keep='last')]
+    rows = row_of.reindex(graph['ids']).to_numpy()
+    found = np.flatnonzero(~np.isnan(rows))
+    select = sparse.csr_matrix((np.ones(len(found)), (found, rows[found].astype(int))),
+                               shape=(len(graph['ids']), len(papers)))
+    return (select @ P).tocsr(), concept_ids
+
+
+def paper_matrix(A, kind: str) -> sparse.csr_matrix:
+    """
+    Paper × paper matrix of a citing × cited matrix A, without the diagonal:
+        cocitation: AᵀA, number of papers citing both
+        coupling:   AAᵀ, number of references shared by both
+    """
+    M = (A.T @ A) if kind == 'cocitation' else (A @ A.T)
+    M = M.tolil()
+    M.setdiag(0)
+    M = M.tocsr()
+    M.eliminate_zeros()
+    return M
+
+
+def concept_matrix(A, P, kind: str) -> sparse.csr_matrix:
+    """
+    Pᵀ M P for M = paper_matrix(A, kind), computed without forming M:
+    with Q = A P (cocitation) or Aᵀ P (coupling), Pᵀ M P = QᵀQ minus the
+    contribution of the diagonal of M (a paper paired with itself).
+    Stays (concepts × concepts) whatever the number of papers.
+    """
+    A = sparse.csr_matrix(A)
+    if kind == 'cocitation':
+        Q, self_links = A @ P, np.asarray(A.sum(axis=0)).ravel()
+    else:
+        Q, self_links = A.T @ P, np.asarray(A.sum(axis=1)).ravel()
+    C = (Q.T @ Q) - P.T @ sparse.diags(self_links) @ P
+    C = sparse.csr_matrix(C)
+    C.eliminate_zeros()
+    return C
+
+
+def top_pairs(C, labels, k: int = 100) -> pd.DataFrame:
+    """
+    The k largest entries of a symmetric matrix as unordered pairs
+    (upper triangle, diagonal included). Returns (Concept1, Concept2, Score).
+    """
+    upper = sparse.coo_matrix(sparse.triu(C))
+    if upper.nnz > k:
+        keep = np.argpartition(-upper.data, k - 1)[:k]
+    else:
+        keep = np.arange(upper.nnz)
+    keep = keep[np.argsort(-upper.data[keep], kind='stable')]
+    return pd.DataFrame({
+        'Concept1': labels[upper.row[keep]],
+        'Concept2': labels[upper.col[keep]],
+        'Score': upper.data[keep],
+    })
+
+
+def iter_periods(graph: dict, papers: pd.DataFrame, cumulative: bool = True):
+    """
+    Yields (year, A_period) where A_period keeps the citations made by the papers
+    published in that year (or up to that year if `cumulative`). Citing papers
+    without a date are left out.
+    """
+    A = adjacency(graph)
+    years = publication_years(graph, papers)
+    citing_years = years[np.diff(graph['indptr']) > 0]
+    for year in np.unique(citing_years[~np.isnan(citing_years)]):
+        active = (years <= year) if cumulative else (years == year)
+        yield int(year), sparse.diags(active.astype(float)) @ A
+
+
+def write_top_pairs(graph: dict, papers: pd.DataFrame, out_dir='coupling_csvs',
+                    k: int = 100, cumulative: bool = True):
+    """
+    For every period writes the top-k concept pairs of co-citation and of
+    bibliographic coupling: {kind}_{year}_top_pairs.csv (Concept1, Concept2, Score).
+    Each pair of papers linked by co-citation or coupling adds its link count to
+    the pairs (concept of one paper, concept of the other).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    P, concept_ids = graph_incidence(graph, papers)
+    for year, A in iter_periods(graph, papers, cumulative):
+        for kind in KINDS:
+            C = concept_matrix(A, P, kind)
+            # (a, a) is reached from both orders of each paper pair: count it once
+            C = C - sparse.diags(C.diagonal() / 2)
+            pairs = top_pairs(C, concept_ids, k)
+            pairs.to_csv(os.path.join(out_dir, f"{kind}_{year}_top_pairs.csv"), index=False)
+        print(f"✔ {year}: {A.nnz:,} citations")
+
+
+if __name__ == "__main__":
+    papers = load_papers('quantum_networks_subtree_papers_dates.csv')
+    graph = load_citation_graph('knowledge_graph.ttl')
+    write_top_pairs(graph, papers)
@@ -0,0 +1,238 @@
+import os
+import re
+from array import array
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Predicates of our Turtle files (see knowledge_graph.ttl / filtered_citations.ttl)
+CITES = "http://example.org/citation#cites"
+PUBLICATION_DATE = "http://example.org/citation#publication_date"
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+
+# One Turtle / N-Triples token: IRI, literal (with optional datatype or language),
+# directive, prefixed name (or blank node label), the `a` keyword, punctuation
+_TOKEN = re.compile(r'''
+    \s*(?:
+        <(?P<iri>[^>]*)>
+      | (?P<lit>"""[\s\S]*?"""|"(?:[^"\\]|\\.)*")(?:\^\^(?:<[^>]*>|[\w-]*:[\w-]*)|@[\w-]+)?
+      | (?P<dir>@prefix|@base|PREFIX|BASE)\b
+      | (?P<pname>(?:[A-Za-z_][\w-]*)?:[\w-]*(?:\.[\w-]+)*)
+      | (?P<a>a)(?=[\s<])
+      | (?P<punct>[,;.])
+      | (?P<comment>\#.*)
+    )''', re.VERBOSE)
+
+_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", '"': '"', "'": "'", "\\": "\\"}
+
+
+def _unquote(lit: str) -> str:
+    body = lit[3:-3] if lit.startswith('"""') else lit[1:-1]
+    return re.sub(r'\\(.)', lambda m: _ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def _lines(path):
+    """
+    Yields logical lines: a triple-quoted literal spread over several lines
+    is returned as one piece.
+    """
+    with open(path, encoding="utf-8") as f:
+        buffer = ""
+        for line in f:
+            buffer += line
+            if buffer.count('"""') % 2 == 0:
+                yield buffer
+                buffer = ""
+        if buffer.strip():
+            yield buffer
+
+
+def iter_triples(path):
+    """
+    Streams the (subject, predicate, object) triples of a Turtle or N-Triples file
+    without building a graph. IRIs and prefixed names are returned as full IRIs,
+    literals as their (unescaped) string value. Covers the layout written by rdflib
+    for our citation files (prefixes, `a`, `;` and `,` lists); blank node
+    brackets and collections are not supported.
+    """
+    prefixes, terms = {}, []
+    directive = None
+
+    def term(m):
+        if m.group("iri") is not None:
+            return m.group("iri")
+        if m.group("lit") is not None:
+            return _unquote(m.group("lit"))
+        if m.group("a") is not None:
+            return RDF_TYPE
+        prefix, _, local = m.group("pname").partition(":")
+        if prefix == "_":
+            return m.group("pname")
+        if prefix not in prefixes:
+            raise ValueError(f"Unknown prefix '{prefix}:' in {path}")
+        return prefixes[prefix] + local
+
+    for line_no, line in enumerate(_lines(path), 1):
+        pos, end = 0, len(line.rstrip())
+        while pos < end:
+            m = _TOKEN.match(line, pos)
+            if m is None or m.end() == pos:
+                raise ValueError(f"Cannot parse {path} line {line_no}: {line[pos:pos + 40]!r}")
+            pos = m.end()
+            if m.group("comment") is not None:
+                continue
+
+            if directive is not None:
+                # @prefix ns1: <iri> .   /   PREFIX ns1: <iri>
+                if m.group("pname") is not None:
+                    directive.append(m.group("pname").rstrip(":"))
+                elif m.group("iri") is not None:
+                    if directive[0] in ("@prefix", "PREFIX"):
+                        prefixes[directive[1]] = m.group("iri")
+                    if directive[0] == "BASE" or directive[0] == "PREFIX":
+                        directive = None
+                elif m.group("punct") == ".":
+                    directive = None
+                continue
+            if m.group("dir") is not None:
+                directive = [m.group("dir")]
+                continue
+
+            punct = m.group("punct")
+            if punct is None:
+                terms.append(term(m))
+                if len(terms) == 3:
+                    yield terms[0], terms[1], terms[2]
+            elif punct == ",":
+                terms = terms[:2]
+            elif punct == ";":
+                terms = terms[:1]
+            else:
+                terms = []
+
+
+def work_id(iri: str) -> str:
+    """
+    OpenAlex work ID of a paper IRI (http://example.org/paper#W123 -> W123).
+    """
+    return re.split(r"[#/]", iri)[-1]
+
+
+# -------------------------------------------------------------------
+# CSR citation graph
+# -------------------------------------------------------------------
+def default_cache_path(ttl_path) -> Path:
+    return Path(ttl_path).with_suffix(".csr.npz")
+
+
+def build_citation_graph(ttl_path) -> dict:
+    """
+    One streaming pass over the Turtle file. Work IDs are interned to integers
+    as they appear and citations are stored as a CSR adjacency:
+    the papers cited by paper i are ids[indices[indptr[i]:indptr[i + 1]]].
+    Returns {"ids", "indptr", "indices", "dates"} ("dates" holds the
+    publication_date literal of each paper, "" if absent).
+    """
+    index, dates = {}, {}
+    src, dst = array("i"), array("i")
+
+    def intern(iri):
+        key = work_id(iri)
+        if key not in index:
+            index[key] = len(index)
+        return index[key]
+
+    for s, p, o in iter_triples(ttl_path):
+        if p == CITES:
+            src.append(intern(s))
+            dst.append(intern(o))
+        elif p == PUBLICATION_DATE:
+            dates[intern(s)] = o
+
+    n = len(index)
+    src = np.frombuffer(src, dtype=np.int32) if len(src) else np.zeros(0, dtype=np.int32)
+    dst = np.frombuffer(dst, dtype=np.int32) if len(dst) else np.zeros(0, dtype=np.int32)
+
+    # Drop repeated citations, then sort by citing paper
+    edges = np.unique((src.astype(np.int64) << 32) | dst)
+    src, dst = (edges >> 32).astype(np.int32), (edges & 0xFFFFFFFF).astype(np.int32)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+
+    date_arr = np.full(n, "", dtype=object)
+    for i, d in dates.items():
+        date_arr[i] = d
+    return {
+        "ids": np.array(list(index), dtype=str),
+        "indptr": indptr,
+        "indices": dst,
+        "dates": date_arr.astype(str),
+    }
+
+
+def load_citation_graph(ttl_path, cache_path=None, rebuild: bool = False) -> dict:
+    """
+    Returns the CSR citation graph of `ttl_path` (see build_citation_graph).
+    The graph is cached as a binary .npz next to the Turtle file and reused as long
+    as the Turtle file keeps the same size and modification time.
+    """
+    ttl_path = Path(ttl_path)
+    cache_path = Path(cache_path) if cache_path else default_cache_path(ttl_path)
+    stat = os.stat(ttl_path)
+    stamp = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+    if not rebuild and cache_path.exists():
+        with np.load(cache_path, allow_pickle=False) as data:
+            if np.array_equal(data["source_stamp"], stamp):
+                return {k: data[k] for k in ("ids", "indptr", "indices", "dates")}
+
+    graph = build_citation_graph(ttl_path)
+    np.savez(cache_path, source_stamp=stamp, **graph)
+    return graph
+
+
+def citation_edges(graph: dict):
+    """
+    (citing, cited) integer arrays of all citations of the graph.
+    """
+    citing = np.repeat(np.arange(len(graph["ids"]), dtype=np.int32), np.diff(graph["indptr"]))
+    return citing, graph["indices"]
+
+
+def cited_by(graph: dict, paper: str) -> np.ndarray:
+    """
+    Work IDs cited by `paper` (empty if unknown).
+    """
+    pos = np.flatnonzero(graph["ids"] == paper)
+    if len(pos) == 0:
+        return np.zeros(0, dtype=str)
+    i = pos[0]
+    return graph["ids"][graph["indices"][graph["indptr"][i]:graph["indptr"][i + 1]]]
+
+
+def adjacency(graph: dict) -> sparse.csr_matrix:
+    """
+    Citing × cited sparse matrix over all the works of the graph (rows and
+    columns follow graph["ids"]).
+    """
+    n = len(graph["ids"])
+    return sparse.csr_matrix((np.ones(len(graph["indices"])), graph["indices"], graph["indptr"]),
+                             shape=(n, n))
+
+
+def publication_years(graph: dict, papers: pd.DataFrame = None) -> np.ndarray:
+    """
+    Publication year of every work of the graph (NaN if unknown), from the
+    publication_date column of `papers` (paper_id, publication_date) when the
+    work is listed there, else from the publication_date stored in the graph.
+    """
+    ids = graph["ids"]
+    dates = pd.Series(graph["dates"], index=ids).replace("", np.nan)
+    if papers is not None:
+        csv_dates = pd.Series(papers["publication_date"].to_numpy(),
+                              index=papers["paper_id"].map(work_id)).dropna()
+        csv_dates = csv_dates[~csv_dates.index.duplicated(keep="last")]
+        dates = csv_dates.reindex(ids).fillna(dates)
+    return pd.to_datetime(dates, errors="coerce").dt.year.to_numpy(dtype=float)
@@ -0,0 +1,201 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from citation_graph import load_citation_graph
+
+SEASONS = ['winter', 'spring', 'summer', 'fall']  # months 1-3, 4-6, 7-9, 10-12
+
+
+# -------------------------------------------------------------------
+# Papers and their concepts
+# -------------------------------------------------------------------
+def load_papers(csv_file) -> pd.DataFrame:
+    """
+    Reads a papers CSV (paper_id, publication_date, concepts, ...) and adds
+    'date' (datetime, NaT if missing) and 'concept_ids' (list of concept IDs).
+    """
+    df = pd.read_csv(csv_file).drop_duplicates('paper_id', keep='last').reset_index(drop=True)
+    df['date'] = pd.to_datetime(df['publication_date'], errors='coerce')
+    df['concept_ids'] = [
+        [item.split('|')[0] for item in s.split(';') if item] if pd.notnull(s) else []
+        for s in df['concepts']
+    ]
+    return df
+
+
+def concept_incidence(papers: pd.DataFrame, weights: pd.Series = None):
+    """
+    Binary paper × concept incidence matrix P (rows aligned with `papers`).
+    Concepts are sorted by ID, so a pair (i, j) with i < j is also in ID order.
+    With `weights` (work ID -> weight, e.g. paper_rank.paper_weights) row i is
+    scaled by the weight of paper i instead (1 for papers without a weight).
+    Returns (P, concept_ids).
+    """
+    lengths = papers['concept_ids'].str.len().to_numpy()
+    flat = np.array([c for ids in papers['concept_ids'] for c in ids], dtype=str)
+    concept_ids, cols = np.unique(flat, return_inverse=True)
+    rows = np.repeat(np.arange(len(papers)), lengths)
+    P = sparse.csr_matrix((np.ones(len(cols)), (rows, cols)),
+                          shape=(len(papers), len(concept_ids)))
+    P.data[:] = 1.0  # a concept listed twice in a paper counts once
+    if weights is not None:
+        w = weights.reindex(papers['paper_id'].map(lambda p: p.split('/')[-1])).fillna(1.0)
+        P = (sparse.diags(w.to_numpy(dtype=float)) @ P).tocsr()
+    return P, concept_ids
+
+
+def citation_matrix(graph: dict, papers: pd.DataFrame) -> sparse.csr_matrix:
+    """
+    Citing × cited matrix A over the rows of `papers`, from a CSR citation graph
+    (citation_graph.load_citation_graph). Citations to or from papers outside
+    the CSV are dropped.
+    """
+    row_of = pd.Series(np.arange(len(papers)), index=papers['paper_id'])
+    citing = np.repeat(np.arange(len(graph['ids'])), np.diff(graph['indptr']))
+    src = row_of.reindex(graph['ids'][citing]).to_numpy()
+    dst = row_of.reindex(graph['ids'][graph['indices']]).to_numpy()
+    keep = ~(np.isnan(src) | np.isnan(dst))
+    n = len(papers)
+    A = sparse.csr_matrix((np.ones(keep.sum()), (src[keep].astype(int), dst[keep].astype(int))),
+                          shape=(n, n))
+    A.data[:] = 1.0
+    return A
+
+
+def fold_pairs(C, concept_ids) -> pd.DataFrame:
+    """
+    Turns a concept × concept count matrix into unordered pairs:
+    (a, b) and (b, a) are added together, (a, a) is kept once.
+    Returns a DataFrame (Concept1, Concept2, Score) with Concept1 <= Concept2.
+    """
+    C = sparse.csr_matrix(C)
+    folded = sparse.triu(C + C.T, k=1) + sparse.diags(C.diagonal())
+    folded = sparse.coo_matrix(folded)
+    folded.eliminate_zeros()
+    return pd.DataFrame({
+        'Concept1': concept_ids[folded.row],
+        'Concept2': concept_ids[folded.col],
+        'Score': folded.data,
+    })
+
+
+# -------------------------------------------------------------------
+# Citation-linked concept pairs: one concept in the citing paper, one in the cited
+# -------------------------------------------------------------------
+def citation_pair_counts(papers: pd.DataFrame, graph: dict, weights: pd.Series = None) -> pd.DataFrame:
+    """
+    For every year y (publication year of the cited paper), counts the citations
+    linking a concept of the citing paper to a concept of the cited paper:
+        C_y = Pᵀ · A_y · P
+    where A_y keeps the citations whose cited paper is from year y (and whose
+    citing paper has a date). With `weights`, each citation counts for the weight
+    of the cited paper. Returns (Concept1, Concept2, Year, Score).
+    """
+    P, concept_ids = concept_incidence(papers)
+    P_cited = P if weights is None else concept_incidence(papers, weights)[0]
+    A = citation_matrix(graph, papers)
+    years = papers['date'].dt.year.to_numpy()
+    dated = ~np.isnan(years)
+
+    # citing papers without a date are left out
+    A = sparse.diags(dated.astype(float)) @ A
+    PtA = (P.T @ A).tocsr()
+
+    frames = []
+    for year in np.unique(years[dated]):
+        in_year = sparse.diags((years == year).astype(float))
+        C = PtA @ in_year @ P_cited
+        pairs = fold_pairs(C, concept_ids)
+        if weights is None:
+            pairs = pairs.astype({'Score': np.int64})
+        pairs.insert(2, 'Year', int(year))
+        frames.append(pairs)
+    if not frames:
+        return pd.DataFrame(columns=['Concept1', 'Concept2', 'Year', 'Score'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def cooccurrence_matrix(papers: pd.DataFrame, weights: pd.Series = None):
+    """
+    Concept co-occurrence matrix Pᵀ W P (number of papers, or total paper weight,
+    per pair of concepts; the diagonal holds the concept totals). This is the
+    weighted concept graph to feed the Adamic-Adar and co-occurrence analyses.
+    Returns (C, concept_ids).
+    """
+    P, concept_ids = concept_incidence(papers)
+    if weights is None:
+        return (P.T @ P).tocsr(), concept_ids
+    return (P.T @ concept_incidence(papers, weights)[0]).tocsr(), concept_ids
+
+
+# -------------------------------------------------------------------
+# Seasonal Jaccard scores on the cumulative co-occurrence graph
+# -------------------------------------------------------------------
+def season_labels(dates: pd.Series) -> pd.Series:
+    """
+    'winter_2010', 'spring_2010', ... for each date (NaN if missing).
+    """
+    season = (dates.dt.month - 1) // 3
+    label = season.map(dict(enumerate(SEASONS))) + '_' + dates.dt.year.astype('Int64').astype(str)
+    return label.where(dates.notna())
+
+
+def seasonal_jaccard(papers: pd.DataFrame):
+    """
+    One pass over the seasons in time order. The concept co-occurrence graph of all
+    papers published up to the end of each season is updated with that season's
+    papers only (C += P_sᵀ P_s), and for every edge (u, v) of the graph
+        Jaccard(u, v) = |N(u) ∩ N(v)| / |N(u) ∪ N(v)|
+    is read from the common-neighbour counts B·B of the binary adjacency B.
+    Yields (season_label, DataFrame(Concept1, Concept2, JaccardScore)) with short
+    concept IDs (C123...), only for seasons with at least one paper.
+    """
+    P, concept_ids = concept_incidence(papers)
+    short_ids = np.array([c.split('/')[-1] for c in concept_ids], dtype=str)
+    dated = papers['date'].notna().to_numpy()
+    order = papers.loc[dated, 'date'].dt.year * 4 + (papers.loc[dated, 'date'].dt.month - 1) // 3
+    labels = season_labels(papers['date'])
+
+    cooc = sparse.csr_matrix((len(concept_ids),) * 2)
+    for key in np.unique(order):
+        rows = order.index[order == key].to_numpy()
+        Ps = P[rows]
+        cooc = cooc + Ps.T @ Ps
+
+        B = cooc.copy()
+        B.setdiag(0)
+        B.eliminate_zeros()
+        B.data[:] = 1.0
+        deg = np.asarray(B.sum(axis=1)).ravel()
+        common = sparse.coo_matrix(sparse.triu((B @ B).multiply(B), k=1))
+        edges = sparse.coo_matrix(sparse.triu(B, k=1))
+
+        # edges without common neighbours are absent from `common`: align on B
+        inter = np.asarray(sparse.csr_matrix(common)[edges.row, edges.col]).ravel()
+        union = deg[edges.row] + deg[edges.col] - inter
+        yield labels[rows[0]], pd.DataFrame({
+            'Concept1': short_ids[edges.row],
+            'Concept2': short_ids[edges.col],
+            'JaccardScore': inter / union,
+        })
+
+
+def write_season_jaccard(papers: pd.DataFrame, out_dir='season_csvs'):
+    """
+    Writes {season}_{year}_jac_scores.csv for every season (see seasonal_jaccard).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    for label, scores in seasonal_jaccard(papers):
+        scores.to_csv(os.path.join(out_dir, f"{label}_jac_scores.csv"), index=False)
+
+
+if __name__ == "__main__":
+    papers = load_papers('quantum_networks_subtree_papers_dates100.csv')
+    graph = load_citation_graph('filtered_citations.ttl')
+    citation_pair_counts(papers, graph).to_csv('concept_pairs_over_time.csv', index=False)
+    print("Saved concept pairs over time to 'concept_pairs_over_time.csv'.")
+
+    write_season_jaccard(load_papers('quantum_networks_subtree_papers_dates.csv'))
+    print("Saved seasonal Jaccard scores to 'season_csvs'.")
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from citation_graph import adjacency, load_citation_graph, publication_years
+
+
+def _power_iteration(step, x0, tol: float = 1e-10, max_iter: int = 1000):
+    """
+    Iterates x <- step(x) from x0 until the L1 change is below `tol`.
+    Returns (x, number of iterations).
+    """
+    x = x0
+    for it in range(1, max_iter + 1):
+        new = step(x)
+        if np.abs(new - x).sum() < tol:
+            return new, it
+        x = new
+    return x, max_iter
+
+
+def pagerank(A, present, x0=None, damping: float = 0.85, tol: float = 1e-10):
+    """
+    PageRank of a citing × cited matrix A (a walker follows citations towards
+    older papers). Teleports and dangling papers jump uniformly to the `present`
+    papers (boolean mask); the others keep a score of 0.
+    `x0` is the starting vector (e.g. the previous snapshot), uniform if None.
+    Returns (scores summing to 1, iterations).
+    """
+    n = A.shape[0]
+    out_deg = np.asarray(A.sum(axis=1)).ravel()
+    inv = np.divide(1.0, out_deg, out=np.zeros(n), where=out_deg > 0)
+    WT = (sparse.diags(inv) @ A).T.tocsr()  # column-stochastic transition, transposed
+    v = present / present.sum()
+    dangling = present & (out_deg == 0)
+
+    if x0 is None:
+        x0 = v.copy()
+    else:
+        # papers new to this snapshot start from the uniform share
+        x0 = np.where(present, np.where(x0 > 0, x0, 1.0 / present.sum()), 0.0)
+        x0 = x0 / x0.sum()
+
+    def step(x):
+        return damping * (WT @ x + x[dangling].sum() * v) + (1 - damping) * v
+
+    return _power_iteration(step, x0, tol)
+
+
+def citerank(A, age, x0=None, alpha: float = 0.5, tau: float = 2.6, tol: float = 1e-10):
+    """
+    CiteRank traffic T = Σ_k (α W)^k ρ (Walker et al., 2007): readers start on
+    a paper with probability ρ ∝ exp(-age / tau), favouring recent papers, and follow
+    a citation with probability α. `age` is the age of each paper at the snapshot
+    (NaN: never a starting point). Returns (traffic, iterations).
+    """
+    n = A.shape[0]
+    out_deg = np.asarray(A.sum(axis=1)).ravel()
+    inv = np.divide(1.0, out_deg, out=np.zeros(n), where=out_deg > 0)
+    WT = (sparse.diags(inv) @ A).T.tocsr()
+    rho = np.where(np.isnan(age), 0.0, np.exp(-np.nan_to_num(age) / tau))
+    rho = rho / rho.sum() if rho.sum() > 0 else rho
+
+    def step(x):
+        return rho + alpha * (WT @ x)
+
+    return _power_iteration(step, rho.copy() if x0 is None else x0, tol)
+
+
+def snapshot_scores(graph: dict, papers: pd.DataFrame = None, damping: float = 0.85,
+                    alpha: float = 0.5, tau: float = 2.6):
+    """
+    Scores of every cumulative snapshot (citations made by papers published up to
+    each year, as in visualisation/). Each snapshot's PageRank and CiteRank start
+    from the previous snapshot's vectors, so only a few iterations are needed.
+    Yields (year, DataFrame(paper_id, in_degree, pagerank, citerank), iterations)
+    with the papers present in the snapshot (citing or cited).
+    """
+    A = adjacency(graph)
+    years = publication_years(graph, papers)
+    citing_years = years[np.diff(graph['indptr']) > 0]
+    pr = cr = None
+
+    for year in np.unique(citing_years[~np.isnan(citing_years)]):
+        active = years <= year
+        A_y = (sparse.diags(active.astype(float)) @ A).tocsr()
+        A_y.eliminate_zeros()
+        in_deg = np.asarray(A_y.sum(axis=0)).ravel()
+        present = (active & (np.diff(A_y.indptr) > 0)) | (in_deg > 0)
+        age = np.where(present & (years <= year), year - years, np.nan)
+
+        pr, it_pr = pagerank(A_y, present, pr, damping)
+        cr, it_cr = citerank(A_y, age, cr, alpha, tau)
+        scores = pd.DataFrame({
+            'paper_id': graph['ids'][present],
+            'in_degree': in_deg[present].astype(int),
+            'pagerank': pr[present],
+            'citerank': cr[present],
+        })
+        yield int(year), scores, (it_pr, it_cr)
+
+
+def write_snapshot_scores(graph: dict, papers: pd.DataFrame = None, out_file='paper_scores.csv'):
+    """
+    Writes all snapshots into one long table (snapshot, paper_id, in_degree,
+    pagerank, citerank).
+    """
+    frames = []
+    for year, scores, (it_pr, it_cr) in snapshot_scores(graph, papers):
+        scores.insert(0, 'snapshot', year)
+        frames.append(scores)
+        print(f"✔ {year}: {len(scores):,} papers, PageRank {it_pr} / CiteRank {it_cr} iterations")
+    table = pd.concat(frames, ignore_index=True)
+    table.to_csv(out_file, index=False)
+    return table
+
+
+def paper_weights(scores: pd.DataFrame, snapshot: int = None, column: str = 'pagerank') -> pd.Series:
+    """
+    Per-paper weights (work ID -> score) of one snapshot of the long table, the
+    last one by default, rescaled to a mean of 1 so that weighted counts stay
+    comparable to plain counts. To use with concept_pairs.concept_incidence(weights=...).
+    """
+    if snapshot is None:
+        snapshot = scores['snapshot'].max()
+    s = scores[scores['snapshot'] == snapshot].set_index('paper_id')[column]
+    return s / s.mean()
+
+
+if __name__ == "__main__":
+    papers = pd.read_csv('quantum_networks_subtree_papers_dates.csv')
+    graph = load_citation_graph('knowledge_graph.ttl')
+    write_snapshot_scores(graph, papers)
@@ -0,0 +1,206 @@
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import requests
+
+from citation_graph import work_id
+
+OPENALEX_WORKS = "https://api.openalex.org/works"
+PAPER_IRI = "http://example.org/paper#"
+
+
+# -------------------------------------------------------------------
+# Paper pool
+# -------------------------------------------------------------------
+def load_pool(paper_file) -> pd.DataFrame:
+    """
+    Reads a paper list: nodes.csv (id, title, publication_date) or a subtree CSV
+    (paper_id, title, publication_date, ...). Returns (work_id, number, title,
+    publication_date), one row per work, where `number` is the integer part of
+    the OpenAlex ID (W123 -> 123) used for the joins.
+    """
+    df = pd.read_csv(paper_file)
+    id_col = "paper_id" if "paper_id" in df.columns else "id"
+    pool = pd.DataFrame({
+        "work_id": df[id_col].map(work_id),
+        "title": df["title"] if "title" in df.columns else np.nan,
+        "publication_date": df["publication_date"] if "publication_date" in df.columns else np.nan,
+    })
+    pool = pool.drop_duplicates("work_id", keep="last").reset_index(drop=True)
+    pool.insert(1, "number", work_numbers(pool["work_id"]))
+    return pool
+
+
+def work_numbers(ids) -> np.ndarray:
+    """
+    OpenAlex work IDs or URLs (W123, https://openalex.org/W123) -> int64 123.
+    """
+    return pd.Series(ids, dtype=str).str.extract(r"W(\d+)$")[0].astype(np.int64).to_numpy()
+
+
+# -------------------------------------------------------------------
+# Batched OpenAlex client
+# -------------------------------------------------------------------
+def fetch_references(work_ids, batch_size: int = 50, max_refs: int = None,
+                     pause: float = 0.2, retries: int = 5, timeout: float = 30, session=None):
+    """
+    Bulk-fetches `referenced_works` with one request per `batch_size` works
+    (filter=openalex_id:W1|W2|..., only the needed fields are selected).
+    Yields (citing, cited, meta) per batch: two int64 arrays of work numbers and a
+    DataFrame (number, title, publication_date) of the fetched works. Keeps at most
+    `max_refs` references per work, in the order given by OpenAlex.
+    Rate limiting (HTTP 429), server errors, connection errors and requests taking
+    longer than `timeout` seconds are retried with exponential backoff.
+    """
+    session = session or requests.Session()
+    work_ids = list(work_ids)
+    for start in range(0, len(work_ids), batch_size):
+        batch = work_ids[start:start + batch_size]
+        params = {
+            "filter": "openalex_id:" + "|".join(batch),
+            "select": "id,referenced_works,publication_date,display_name",
+            "per-page": len(batch),
+        }
+        for attempt in range(retries):
+            try:
+                response = session.get(OPENALEX_WORKS, params=params, timeout=timeout)
+            except requests.RequestException:
+                if attempt == retries - 1:
+                    raise
+                time.sleep(pause * 2 ** (attempt + 1))
+                continue
+            if response.status_code != 429 and response.status_code < 500:
+                break
+            time.sleep(pause * 2 ** (attempt + 1))
+        response.raise_for_status()
+        results = response.json().get("results", [])
+
+        citing, cited = [], []
+        for work in results:
+            refs = work.get("referenced_works") or []
+            if max_refs is not None:
+                refs = refs[:max_refs]
+            citing.append(np.full(len(refs), work_numbers([work["id"]])[0], dtype=np.int64))
+            cited.append(work_numbers(refs) if refs else np.zeros(0, dtype=np.int64))
+        meta = pd.DataFrame({
+            "number": work_numbers([w["id"] for w in results]) if results else np.zeros(0, dtype=np.int64),
+            "title": [w.get("display_name") for w in results],
+            "publication_date": [w.get("publication_date") for w in results],
+        })
+        yield (np.concatenate(citing) if citing else np.zeros(0, dtype=np.int64),
+               np.concatenate(cited) if cited else np.zeros(0, dtype=np.int64),
+               meta)
+        time.sleep(pause)  # To respect rate limits
+
+
+# -------------------------------------------------------------------
+# Intra-pool filter and writers
+# -------------------------------------------------------------------
+def intra_pool_edges(citing, cited, pool_numbers):
+    """
+    Keeps the citations whose citing and cited works are both in the pool.
+    Hash join on the integer IDs: one hash table of the pool, one lookup per
+    reference, so the cost is linear in the number of references.
+    Returns (citing, cited) as positions in `pool_numbers`.
+    """
+    index = pd.Index(np.asarray(pool_numbers, dtype=np.int64))
+    src = index.get_indexer(np.asarray(citing, dtype=np.int64))
+    dst = index.get_indexer(np.asarray(cited, dtype=np.int64))
+    keep = (src >= 0) & (dst >= 0)
+    return src[keep], dst[keep]
+
+
+def save_edge_list(path, citing, cited):
+    """
+    Compact binary edge list: two int64 arrays of OpenAlex work numbers.
+    """
+    np.savez_compressed(path, citing=np.asarray(citing, dtype=np.int64),
+                        cited=np.asarray(cited, dtype=np.int64))
+
+
+def load_edge_list(path):
+    with np.load(path) as data:
+        return data["citing"], data["cited"]
+
+
+def _literal(value) -> str:
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+    return f'"{text}"'
+
+
+def write_ttl(path, pool: pd.DataFrame, citing, cited):
+    """
+    Writes the citations in the layout of knowledge_graph.ttl: one ns1:Paper block per
+    work of the pool with its ns1:cites list, publication date and title.
+    `citing` / `cited` are work numbers; citing works outside the pool are skipped.
+    Written block by block, no graph is held in memory.
+    """
+    citing = np.asarray(citing, dtype=np.int64)
+    cited = np.asarray(cited, dtype=np.int64)
+    order = np.lexsort((cited, citing))
+    citing, cited = citing[order], cited[order]
+    papers = pool.sort_values("work_id")
+    numbers = papers["number"].to_numpy()
+    starts = np.searchsorted(citing, numbers, side="left")
+    ends = np.searchsorted(citing, numbers, side="right")
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("@prefix ns1: <http://example.org/citation#> .\n\n")
+        for paper, lo, hi in zip(papers.itertuples(index=False), starts, ends):
+            lines = [f"<{PAPER_IRI}{paper.work_id}> a ns1:Paper"]
+            refs = sorted(f"W{n}" for n in np.unique(cited[lo:hi]))
+            if refs:
+                lines.append("    ns1:cites " + ",\n        ".join(f"<{PAPER_IRI}{r}>" for r in refs))
+            if pd.notnull(paper.publication_date):
+                lines.append(f"    ns1:publication_date {_literal(paper.publication_date)}")
+            if pd.notnull(paper.title):
+                lines.append(f"    ns1:title {_literal(paper.title)}")
+            f.write(" ;\n".join(lines) + " .\n\n")
+
+
+def build_pool_graph(paper_file, out_dir=".", name="pool", max_refs: int = 250,
+                     batch_size: int = 50):
+    """
+    Full build for any paper list (nodes.csv, a subtree CSV, ...):
+        1. fetches the references of every paper in batches,
+        2. writes all of them (at most `max_refs` per paper) as {name}_references.npz
+           and {name}_knowledge_graph.ttl,
+        3. keeps the intra-pool citations with a hash join and writes them as
+           {name}_filtered.npz and {name}_filtered_citations.ttl.
+    Returns (citing, cited) of the intra-pool citations, as work numbers.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    pool = load_pool(paper_file)
+
+    citing, cited, metas = [], [], []
+    for src, dst, meta in fetch_references(pool["work_id"], batch_size=batch_size, max_refs=max_refs):
+        citing.append(src)
+        cited.append(dst)
+        metas.append(meta)
+        print(f"✔ {sum(len(c) for c in citing):,} references fetched")
+    citing = np.concatenate(citing) if citing else np.zeros(0, dtype=np.int64)
+    cited = np.concatenate(cited) if cited else np.zeros(0, dtype=np.int64)
+
+    # missing titles / dates in the paper list are taken from OpenAlex
+    if metas:
+        meta = pd.concat(metas).drop_duplicates("number").set_index("number")
+        for col in ("title", "publication_date"):
+            pool[col] = pool[col].fillna(pool["number"].map(meta[col]))
+
+    save_edge_list(out_dir / f"{name}_references.npz", citing, cited)
+    write_ttl(out_dir / f"{name}_knowledge_graph.ttl", pool, citing, cited)
+
+    src, dst = intra_pool_edges(citing, cited, pool["number"])
+    numbers = pool["number"].to_numpy()
+    citing_in, cited_in = numbers[src], numbers[dst]
+    save_edge_list(out_dir / f"{name}_filtered.npz", citing_in, cited_in)
+    write_ttl(out_dir / f"{name}_filtered_citations.ttl", pool, citing_in, cited_in)
+    print(f"✔ {len(citing_in):,} intra-pool citations among {len(pool):,} papers")
+    return citing_in, cited_in
+
+
+if __name__ == "__main__":
+    build_pool_graph("nodes.csv", name="nodes")
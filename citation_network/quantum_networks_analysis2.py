@@ -1,9 +1,9 @@
-import pandas as pd
-import rdflib
 import requests
-from rdflib import Namespace
 import matplotlib.pyplot as plt
 
+from citation_graph import load_citation_graph
+from concept_pairs import citation_pair_counts, load_papers
+
 def get_display_name(concept_id):
     url = f'https://api.openalex.org/concepts/{concept_id}'
     try:
@@ -24,88 +24,14 @@ TTL_FILE = 'filtered_citations.ttl'
 CSV_FILE = 'quantum_networks_subtree_papers_dates100.csv'
 
 
-# Load your CSV with papers and concepts
-df = pd.read_csv('quantum_networks_subtree_papers_dates100.csv')
-
-# Build a dictionary: paper_id -> set of concept IDs
-paper_concept_pools = {}
-for _, row in df.iterrows():
-    paper_id = row['paper_id']
-    concepts_str = row['concepts']
-    concept_ids = set()
-    if pd.notnull(concepts_str):
-        for item in concepts_str.split(';'):
-            if item:
-                parts = item.split('|')
-                if len(parts) >= 1:
-                    cid = parts[0]
-                    concept_ids.add(cid)
-    paper_concept_pools[paper_id] = concept_ids
-
-# Load graph
-g = rdflib.Graph()
-g.parse(TTL_FILE, format='turtle')
-NS = Namespace("http://example.org/citation#")
-
-# Load paper info
-df = pd.read_csv(CSV_FILE)
-
-# Map paper_id to publication date
-pub_date_map = {}
-for _, row in df.iterrows():
-    pub_date = row['publication_date']
-    if pd.notnull(pub_date):
-        # Extract year
-        year = pub_date.split('-')[0]
-        pub_date_map[row['paper_id']] = int(year)
-    else:
-        pub_date_map[row['paper_id']] = None
-
-# Build citation links
-paper_citations = {}
-for s, p, o in g.triples((None, NS.cites, None)):
-    citing_id = str(s).split('#')[-1]
-    cited_id = str(o).split('#')[-1]
-    if citing_id not in paper_citations:
-        paper_citations[citing_id] = set()
-    paper_citations[citing_id].add(cited_id)
-
-# Now, for each period (year), count concept pairs
-# Initialize data structure: {(pair, year): count}
-pair_year_counts = {}
-
-for citing_paper, cited_papers in paper_citations.items():
-    citing_year = pub_date_map.get(citing_paper)
-    if citing_year is None:
-        continue
-    # Get concepts for citing paper
-    if citing_paper not in paper_concept_pools:
-        continue
-    source_concepts = paper_concept_pools[citing_paper]
-    for cited_paper in cited_papers:
-        cited_year = pub_date_map.get(cited_paper)
-        if cited_year is None:
-            continue
-        if cited_paper not in paper_concept_pools:
-            continue
-        target_concepts = paper_concept_pools[cited_paper]
-        for sc in source_concepts:
-            for tc in target_concepts:
-                pair = tuple(sorted([sc, tc]))
-                key = (pair, cited_year)
-                pair_year_counts[key] = pair_year_counts.get(key, 0) + 1
-
-# Convert to DataFrame
-records = []
-for (pair, year), count in pair_year_counts.items():
-    records.append({
-        'Concept1': pair[0],
-        'Concept2': pair[1],
-        'Year': year,
-        'Score': count
-    })
+# Load papers (concepts, dates) and the citation graph (streamed into a CSR
+# adjacency, cached next to the TTL file)
+papers = load_papers(CSV_FILE)
+graph = load_citation_graph(TTL_FILE)
 
-df_time = pd.DataFrame(records)
+# For each year of the cited paper, count concept pairs (one concept in the citing
+# paper, one in the cited paper) as the sparse product P_citingᵀ · A_year · P_cited
+df_time = citation_pair_counts(papers, graph)
 df_time.to_csv('concept_pairs_over_time.csv', index=False)
 
 print(f"Saved concept pairs over time to 'concept_pairs_over_time.csv'.")
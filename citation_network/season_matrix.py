@@ -0,0 +1,116 @@
+import glob
+import os
+import re
+import numpy as np
+import pandas as pd
+
+SEASONS = ['winter', 'spring', 'summer', 'fall']
+PATTERN = re.compile(r'(spring|summer|fall|winter)_(\d{4})_jac_scores\.csv', re.IGNORECASE)
+
+
+def season_files(csv_dir='season_csvs', min_year: int = 2000):
+    """
+    [(season, year, path)] of the *_jac_scores.csv files from `min_year` on,
+    in time order.
+    """
+    files = []
+    for path in glob.glob(os.path.join(csv_dir, '*_jac_scores.csv')):
+        match = PATTERN.match(os.path.basename(path))
+        if match is None:
+            print(f"Filename pattern not matched: {os.path.basename(path)}")
+            continue
+        season, year = match.group(1).lower(), int(match.group(2))
+        if year >= min_year:
+            files.append((season, year, path))
+    return sorted(files, key=lambda f: (f[1], SEASONS.index(f[0])))
+
+
+def _stamp(files) -> np.ndarray:
+    return np.array([f"{os.path.basename(p)}:{os.path.getsize(p)}:{os.stat(p).st_mtime_ns}"
+                     for _, _, p in files], dtype=str)
+
+
+def build_season_matrix(files) -> dict:
+    """
+    Concatenates the season files (each row tagged with its season code) and
+    pivots them once into a float32 pairs × seasons matrix, NaN where a pair has
+    no score. Columns cover every season from the first to the last year, also
+    the seasons without a file. Pairs are unordered (Concept1 <= Concept2); if a
+    pair is listed twice in one file the last score is kept.
+    Returns {"concept1", "concept2", "seasons", "values"}.
+    """
+    years = [y for _, y, _ in files]
+    seasons = [f"{s}_{y}" for y in range(min(years), max(years) + 1) for s in SEASONS] if files else []
+    column = {label: k for k, label in enumerate(seasons)}
+
+    frames = []
+    for season, year, path in files:
+        df = pd.read_csv(path, usecols=['Concept1', 'Concept2', 'JaccardScore'],
+                         dtype={'Concept1': str, 'Concept2': str, 'JaccardScore': np.float32})
+        df['season'] = np.int32(column[f"{season}_{year}"])
+        frames.append(df)
+    if not frames:
+        return {"concept1": np.zeros(0, dtype=str), "concept2": np.zeros(0, dtype=str),
+                "seasons": np.array(seasons, dtype=str), "values": np.zeros((0, len(seasons)), np.float32)}
+    scores = pd.concat(frames, ignore_index=True)
+
+    a, b = scores['Concept1'].to_numpy(dtype=str), scores['Concept2'].to_numpy(dtype=str)
+    swap = a > b
+    lo, hi = np.where(swap, b, a), np.where(swap, a, b)
+    concepts, codes = np.unique(np.concatenate([lo, hi]), return_inverse=True)
+    key = codes[:len(lo)].astype(np.int64) * len(concepts) + codes[len(lo):]
+    pair_keys, pair_pos = np.unique(key, return_inverse=True)
+
+    # drop duplicates (same pair, same season) keeping the last row
+    cell = pair_pos.astype(np.int64) * len(seasons) + scores['season'].to_numpy()
+    last = len(cell) - 1 - np.unique(cell[::-1], return_index=True)[1]
+    values = np.full((len(pair_keys), len(seasons)), np.nan, dtype=np.float32)
+    values[pair_pos[last], scores['season'].to_numpy()[last]] = scores['JaccardScore'].to_numpy()[last]
+
+    return {
+        "concept1": concepts[pair_keys // len(concepts)],
+        "concept2": concepts[pair_keys % len(concepts)],
+        "seasons": np.array(seasons, dtype=str),
+        "values": values,
+    }
+
+
+def load_season_matrix(csv_dir='season_csvs', min_year: int = 2000, cache_file=None,
+                       rebuild: bool = False) -> dict:
+    """
+    Season matrix of `csv_dir` (see build_season_matrix), cached in
+    `cache_file` (default: {csv_dir}/season_matrix_{min_year}.npz). The cache is
+    reused while the list of files and their sizes / modification times are unchanged.
+    """
+    files = season_files(csv_dir, min_year)
+    cache_file = cache_file or os.path.join(csv_dir, f"season_matrix_{min_year}.npz")
+    stamp = _stamp(files)
+    if not rebuild and os.path.exists(cache_file):
+        with np.load(cache_file, allow_pickle=False) as data:
+            if np.array_equal(data['stamp'], stamp):
+                return {k: data[k] for k in ("concept1", "concept2", "seasons", "values")}
+    matrix = build_season_matrix(files)
+    np.savez_compressed(cache_file, stamp=stamp, **matrix)
+    return matrix
+
+
+def top_pairs_by_mean(matrix: dict, k: int = 10) -> pd.DataFrame:
+    """
+    The k pairs with the highest mean score over the seasons where they have a
+    score. Returns (Concept1, Concept2, AverageScore, row) sorted by decreasing
+    mean, `row` being the row of the pair in matrix["values"].
+    """
+    values = matrix['values']
+    counts = (~np.isnan(values)).sum(axis=1)
+    sums = np.nansum(values, axis=1, dtype=np.float64)
+    mean = np.divide(sums, counts, out=np.full(len(values), np.nan), where=counts > 0)
+    ranked = np.where(np.isnan(mean), -np.inf, mean)
+    k = min(k, len(mean))
+    top = np.argpartition(-ranked, k - 1)[:k] if 0 < k < len(mean) else np.arange(k)
+    top = top[np.argsort(-ranked[top], kind='stable')]
+    return pd.DataFrame({
+        'Concept1': matrix['concept1'][top],
+        'Concept2': matrix['concept2'][top],
+        'AverageScore': mean[top],
+        'row': top,
+    })
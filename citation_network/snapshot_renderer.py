@@ -0,0 +1,172 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Batch rendering never opens a window
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib import animation
+
+from citation_graph import citation_edges, load_citation_graph, publication_years, work_id
+
+
+def load_nodes(nodes_file='nodes.csv') -> pd.DataFrame:
+    """
+    nodes.csv (unique_id, id, title, publication_date) with paper_id = work ID.
+    """
+    nodes = pd.read_csv(nodes_file)
+    nodes['paper_id'] = nodes['id'].map(work_id)
+    return nodes
+
+
+def snapshot_years(years) -> np.ndarray:
+    """
+    One cumulative snapshot per year in which at least one paper was published.
+    """
+    years = np.asarray(years, dtype=float)
+    return np.unique(years[~np.isnan(years)]).astype(int)
+
+
+def place_new_nodes(xy, new, edges, k: float, iterations: int = 50, gravity: float = 0.1):
+    """
+    Fruchterman-Reingold steps where only the rows `new` of `xy` move: repulsion
+    k²/d from every node, attraction d²/k along `edges` (pairs of rows) and a
+    spring towards the centre so that unconnected papers do not drift away.
+    The other nodes are fixed; only (new × all) distances are computed.
+    """
+    xy = xy.copy()
+    moving = np.zeros(len(xy), dtype=bool)
+    moving[new] = True
+    a, b = edges[:, 0], edges[:, 1]
+    for it in range(iterations):
+        temperature = k * (1 - it / iterations)
+        delta = xy[new][:, None, :] - xy[None, :, :]
+        dist = np.maximum(np.linalg.norm(delta, axis=2), 0.01 * k)
+        disp = (delta * (k * k / dist ** 2)[:, :, None]).sum(axis=1)
+
+        pull = np.zeros_like(xy)
+        d = xy[a] - xy[b]
+        force = d * (np.linalg.norm(d, axis=1) / k)[:, None]
+        np.add.at(pull, a, -force)
+        np.add.at(pull, b, force)
+        centre = xy.mean(axis=0)
+        disp += pull[new] - gravity * (xy[new] - centre) * np.linalg.norm(xy[new] - centre, axis=1)[:, None] / k
+
+        length = np.maximum(np.linalg.norm(disp, axis=1), 1e-12)
+        xy[new] += disp * (np.minimum(length, temperature) / length)[:, None]
+    return xy
+
+
+def incremental_layouts(graph: dict, years, snapshots, iterations: int = 50, seed: int = 0) -> dict:
+    """
+    Positions of the papers for every snapshot (papers published up to that year).
+    Papers already placed keep their position, only the new ones are laid out,
+    starting next to their placed neighbours (or at a random point).
+    Returns {year: {paper index: (x, y)}}; the position of a paper never changes
+    once it has appeared.
+    """
+    rng = np.random.default_rng(seed)
+    citing, cited = citation_edges(graph)
+    # one spring length for all snapshots, so that the scale does not drift
+    k = 1 / np.sqrt(max(int(np.sum(years <= snapshots[-1])), 1)) if len(snapshots) else 1.0
+    xy = np.full((len(years), 2), np.nan)
+    placed = np.zeros(len(years), dtype=bool)
+    layouts = {}
+
+    for year in snapshots:
+        present = years <= year
+        new = np.flatnonzero(present & ~placed)
+        inside = present[citing] & present[cited]
+        edges = np.column_stack([citing[inside], cited[inside]])
+
+        # start: mean of the already placed neighbours + noise, else random
+        total = np.zeros((len(years), 2))
+        count = np.zeros(len(years))
+        for u, v in ((edges[:, 0], edges[:, 1]), (edges[:, 1], edges[:, 0])):
+            known = placed[v]
+            np.add.at(total, u[known], xy[v[known]])
+            np.add.at(count, u[known], 1)
+        start = np.where(count[new, None] > 0, total[new] / np.maximum(count[new], 1)[:, None],
+                         rng.uniform(-0.5, 0.5, (len(new), 2)))
+        xy[new] = start + rng.normal(scale=k / 2, size=(len(new), 2))
+
+        rows = np.flatnonzero(present)
+        local = np.full(len(years), -1)
+        local[rows] = np.arange(len(rows))
+        moved = place_new_nodes(xy[rows], local[new], local[edges], k, iterations)
+        xy[new] = moved[local[new]]
+        placed[new] = True
+        layouts[int(year)] = {int(i): xy[i].copy() for i in rows}
+    return layouts
+
+
+def render_snapshots(graph: dict, papers: pd.DataFrame, out_dir='visualisation_incremental',
+                     animation_file=None, fps: int = 2, labels: bool = True,
+                     figsize=(12, 8), dpi: int = 100) -> list:
+    """
+    Renders every cumulative snapshot of the citation graph into
+    {out_dir}/citation_network_{first}_{year}.png, in one process and on one figure.
+    Because positions are stable, each frame only draws the papers and citations
+    that are new since the previous frame, on top of the previous frame.
+    With `animation_file` (.gif, or .mp4 if ffmpeg is installed) the frames are
+    also written as an animation. Returns the list of written images.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    years = publication_years(graph, papers)
+    snapshots = snapshot_years(years)
+    layouts = incremental_layouts(graph, years, snapshots)
+    titles = pd.Series(papers['title'].to_numpy(), index=papers['paper_id'])
+    titles = titles[~titles.index.duplicated(keep='last')].reindex(graph['ids'])
+    titles = titles.fillna(pd.Series(graph['ids'], index=graph['ids']))
+    citing, cited = citation_edges(graph)
+
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.set_axis_off()
+    if snapshots.size:
+        final = np.array(list(layouts[int(snapshots[-1])].values()))
+        margin = 0.1 * (final.max(axis=0) - final.min(axis=0) + 1e-9)
+        ax.set_xlim(final[:, 0].min() - margin[0], final[:, 0].max() + margin[0])
+        ax.set_ylim(final[:, 1].min() - margin[1], final[:, 1].max() + margin[1])
+    fig.tight_layout()
+
+    writer = None
+    if animation_file:
+        writer = (animation.FFMpegWriter(fps=fps) if animation_file.endswith('.mp4')
+                  else animation.PillowWriter(fps=fps))
+        writer.setup(fig, animation_file, dpi=dpi)
+
+    drawn_nodes, drawn_edges, written = set(), np.zeros(len(citing), dtype=bool), []
+    for year in snapshots:
+        pos = layouts[int(year)]
+        new_nodes = [i for i in pos if i not in drawn_nodes]
+        new_edges = np.flatnonzero(~drawn_edges & (years[citing] <= year) & (years[cited] <= year))
+
+        for e in new_edges:
+            ax.annotate("", xy=pos[int(cited[e])], xytext=pos[int(citing[e])], zorder=1,
+                        arrowprops=dict(arrowstyle="-|>", color="black", shrinkA=8, shrinkB=8, lw=1))
+        if new_nodes:
+            xy = np.array([pos[i] for i in new_nodes])
+            ax.scatter(xy[:, 0], xy[:, 1], s=500, color="skyblue", zorder=2)
+            if labels:
+                for i in new_nodes:
+                    ax.text(*pos[i], titles.iloc[i], fontsize=8, ha="center", va="center", zorder=3)
+        drawn_nodes.update(new_nodes)
+        drawn_edges[new_edges] = True
+
+        path = os.path.join(out_dir, f"citation_network_{snapshots[0]}_{year}.png")
+        fig.savefig(path, dpi=dpi)
+        written.append(path)
+        if writer is not None:
+            writer.grab_frame()
+
+    if writer is not None:
+        writer.finish()
+    plt.close(fig)
+    return written
+
+
+if __name__ == "__main__":
+    graph = load_citation_graph('filtered_citations.ttl')
+    render_snapshots(graph, load_nodes('nodes.csv'), out_dir='visualisation_incremental',
+                     animation_file='visualisation_incremental/citation_network.gif')